@@ -0,0 +1,58 @@
+import hashlib
+import os
+import tempfile
+import threading
+from typing import Dict, Optional
+import config
+
+EXTENSIONS = {
+    'image/png': '.png',
+    'image/svg+xml': '.svg',
+    'application/pdf': '.pdf',
+}
+
+class ArtifactStore:
+    """Content-addressed store on the local filesystem.
+
+    Binary artifacts are written once under <root>/<hash[:2]>/<hash><ext>; the
+    workflow state only carries the lightweight reference returned by put().
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path_for(self, digest: str, mime: str) -> str:
+        return os.path.join(self.root, digest[:2], digest + EXTENSIONS.get(mime, '.bin'))
+
+    def put(self, data: bytes, mime: str) -> Dict:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path_for(digest, mime)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temp file and rename so concurrent writers of the same content never see a partial file
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return {'hash': digest, 'path': path, 'mime': mime, 'size': len(data)}
+
+    def read(self, ref: Dict) -> bytes:
+        with open(ref['path'], 'rb') as f:
+            return f.read()
+
+_store: Optional[ArtifactStore] = None
+_store_lock = threading.Lock()
+
+def get_store() -> ArtifactStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ArtifactStore(config.ARTIFACT_DIR)
+    return _store
+
+def resolve_path(visual: Dict) -> Optional[str]:
+    """Filesystem path for a visual's artifact, or None if it is missing"""
+    ref = visual.get('artifact')
+    if ref and os.path.exists(ref['path']):
+        return ref['path']
+    return None
@@ -0,0 +1,131 @@
+"""Batch mode: run many queries through one compiled workflow.
+
+    python batch.py queries.jsonl --output results.jsonl --concurrency 8 --rpm 300
+
+Input is JSONL (one {"query": ..., "id": ..., "formats": [...]} object or bare
+string per line) or CSV with a `query` column and optional `id` / `formats`
+(semicolon separated) columns. Results and failures are appended to the output
+JSONL as each query finishes. Failed runs keep their checkpoint and can be
+resumed with `python run.py resume <thread_id>`.
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator
+
+import content_master
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from shared.instrumentation import configure_logging
+
+logger = logging.getLogger("content_master.batch")
+
+def read_jobs(path: str) -> Iterator[Dict]:
+    """Yield jobs lazily so huge input files are never fully loaded"""
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith(".csv"):
+            for i, row in enumerate(csv.DictReader(f)):
+                formats = [fmt for fmt in (row.get("formats") or "").split(";") if fmt]
+                yield {'id': row.get("id") or str(i), 'query': row["query"], 'formats': formats}
+            return
+        for i, line in enumerate(f):
+            line = line.strip()
+            if not line:
+                continue
+            job = json.loads(line)
+            if isinstance(job, str):
+                job = {'query': job}
+            yield {'id': str(job.get("id", i)), 'query': job["query"], 'formats': job.get("formats") or []}
+
+class ResultWriter:
+    """Appends one JSON line per finished query, flushed immediately"""
+
+    def __init__(self, path: str):
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+        self.succeeded = 0
+        self.failed = 0
+
+    def write(self, record: Dict) -> None:
+        with self._lock:
+            self._file.write(json.dumps(record, default=str) + "\n")
+            self._file.flush()
+            if record['status'] == 'ok':
+                self.succeeded += 1
+            else:
+                self.failed += 1
+
+    def close(self) -> None:
+        self._file.close()
+
+def run_job(job: Dict, output_dir: str, default_formats, writer: ResultWriter) -> None:
+    thread_id = uuid.uuid4().hex
+    start = time.perf_counter()
+    record = {'id': job['id'], 'query': job['query'], 'thread_id': thread_id}
+    try:
+        result = content_master.run_content_master(
+            job['query'], formats=job['formats'] or default_formats, output_dir=output_dir, thread_id=thread_id
+        )
+        record.update({
+            'status': 'ok',
+            'content_type': result['content_type'],
+            'quality_score': result['quality_score'],
+            'files_created': result['final_output'].get('files_created', []),
+            'render_timings': result['final_output'].get('render_timings', {}),
+        })
+    except Exception as e:
+        logger.exception("Query %s failed", job['id'])
+        record.update({'status': 'error', 'error': f"{type(e).__name__}: {e}"})
+    record['elapsed'] = round(time.perf_counter() - start, 3)
+    writer.write(record)
+
+def run_batch(input_path: str, output_path: str, concurrency: int = 4, rpm: float = None, tpm: float = None,
+              formats=None, output_dir: str = None) -> Dict:
+    if rpm or tpm:
+        # One client is shared by every run, so its buckets enforce a global limit
+        content_master.llm.set_limits(requests_per_minute=rpm, tokens_per_minute=tpm)
+    content_master.get_workflow()  # compile once before fanning out
+
+    writer = ResultWriter(output_path)
+    # Bound queued work as well as running work so the input is consumed at the pool's pace
+    slots = threading.BoundedSemaphore(concurrency * 2)
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="batch") as executor:
+            for job in read_jobs(input_path):
+                slots.acquire()
+                future = executor.submit(run_job, job, output_dir, formats, writer)
+                future.add_done_callback(lambda _: slots.release())
+    finally:
+        writer.close()
+    return {
+        'succeeded': writer.succeeded,
+        'failed': writer.failed,
+        'elapsed': round(time.perf_counter() - start, 3)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a file of ContentMaster queries")
+    parser.add_argument("input", help="JSONL or CSV file of queries")
+    parser.add_argument("--output", default="batch_results.jsonl", help="JSONL file results are appended to")
+    parser.add_argument("--concurrency", type=int, default=4, help="queries in flight at once")
+    parser.add_argument("--rpm", type=float, help="global LLM requests-per-minute limit")
+    parser.add_argument("--tpm", type=float, help="global LLM tokens-per-minute limit")
+    parser.add_argument("--formats", nargs="+", help="default output formats for queries that don't set any")
+    parser.add_argument("--output-dir")
+    args = parser.parse_args()
+
+    configure_logging(os.getenv("LOG_LEVEL", "WARNING"))
+    summary = run_batch(args.input, args.output, args.concurrency, args.rpm, args.tpm, args.formats, args.output_dir)
+    print(f"{summary['succeeded']} succeeded, {summary['failed']} failed in {summary['elapsed']}s -> {args.output}")
+    sys.exit(1 if summary['failed'] else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Import-time benchmark for ContentMaster cold start.
+
+Runs `python -X importtime -c "import <module>"` in fresh interpreters and
+reports total import time plus the slowest top-level packages. Results can be
+saved as JSON and compared against a previous run to track regressions.
+
+    python bench_import.py --repeat 5 --json import_times.json
+    python bench_import.py --compare import_times.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def measure(module: str) -> Dict[str, int]:
+    """Import time in microseconds per top-level package for one cold import"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=HERE, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr.strip().splitlines()[-1]}")
+
+    packages: Dict[str, int] = defaultdict(int)
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        # Summing self time per package avoids double counting nested imports
+        packages[name.strip().split(".")[0]] += int(self_us)
+    return dict(packages)
+
+def run(module: str, repeat: int) -> dict:
+    samples = [measure(module) for _ in range(repeat)]
+    names = set().union(*samples)
+    packages = {name: statistics.median(sample.get(name, 0) for sample in samples) for name in names}
+    totals = [sum(sample.values()) for sample in samples]
+    return {
+        'module': module,
+        'repeat': repeat,
+        'total_us': statistics.median(totals),
+        'packages_us': dict(sorted(packages.items(), key=lambda item: item[1], reverse=True))
+    }
+
+def print_report(report: dict, top: int):
+    print(f"import {report['module']}: {report['total_us'] / 1000:.1f} ms (median of {report['repeat']})")
+    for name, micros in list(report['packages_us'].items())[:top]:
+        print(f"  {micros / 1000:8.1f} ms  {name}")
+
+def compare(report: dict, baseline: dict, threshold: float) -> bool:
+    """Print the delta against a baseline; returns True if total import time regressed"""
+    delta = report['total_us'] - baseline['total_us']
+    ratio = delta / baseline['total_us'] if baseline['total_us'] else 0.0
+    print(f"total: {baseline['total_us'] / 1000:.1f} ms -> {report['total_us'] / 1000:.1f} ms ({ratio:+.1%})")
+    for name, micros in report['packages_us'].items():
+        before = baseline['packages_us'].get(name, 0)
+        if micros - before > 5000:
+            print(f"  {name}: {before / 1000:.1f} ms -> {micros / 1000:.1f} ms")
+    return ratio > threshold
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure ContentMaster import time")
+    parser.add_argument("--module", default="content_master")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--compare", help="baseline report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed total regression ratio")
+    args = parser.parse_args()
+
+    report = run(args.module, args.repeat)
+    print_report(report, args.top)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.threshold):
+            print("Import time regression detected")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""Offline benchmark for the ContentMaster workflow.
+
+The module-level LLM and the research providers are replaced with
+deterministic local stand-ins with configurable latency, so the numbers
+reflect pipeline overhead rather than OpenAI or search API variance.
+
+    python benchmark.py --queries 10 --json bench.json
+    python benchmark.py --queries 10 --compare bench.json
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import config
+import content_master
+import research_providers
+from shared.llm_client import LLMClient
+
+TOPICS = ["renewable energy", "quantum computing", "artificial intelligence", "climate policy",
+          "space exploration", "gene editing", "urban mobility", "cyber security"]
+
+QUERY_TEMPLATES = {
+    "presentation": "Create a presentation on {topic}",
+    "document": "Generate a document about {topic}",
+    "webpage": "Build a webpage about {topic}",
+}
+
+class StubResponse:
+    def __init__(self, content: str):
+        self.content = content
+
+class StubLLM:
+    """Deterministic stand-in for ChatOpenAI.invoke with a fixed latency plus jitter"""
+
+    def __init__(self, latency: float, jitter: float, words: int, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.words = words
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _sleep(self):
+        with self._lock:
+            delay = self.latency + self._random.uniform(0, self.jitter)
+        time.sleep(delay)
+
+    def invoke(self, prompt, **kwargs):
+        self._sleep()
+        prompt = str(prompt)
+        if prompt.startswith("Analyze this query"):
+            # Classify the query itself, not the prompt's "(presentation/document/webpage)" hint
+            query = prompt.rsplit(": ", 1)[-1].lower()
+            content = next((kind for kind in ("presentation", "document") if kind in query), "webpage")
+        else:
+            content = " ".join(f"word{i % 97}" for i in range(self.words))
+        # The real client reports usage through a callback; mirror it so token metrics are populated
+        content_master.METRICS.record_tokens(len(prompt) // 4, len(content) // 4)
+        return StubResponse(content)
+
+def stub_provider(name: str, latency: float, results: int):
+    def provider(query: str, timeout: float) -> List[Dict]:
+        time.sleep(min(latency, timeout))
+        return [{
+            'title': f"{name} result {i} for {query}",
+            'url': f"https://{name}.example.org/{i}",
+            'snippet': f"Snippet {i} from {name} about {query}. " * 4
+        } for i in range(results)]
+    return provider
+
+def install_stubs(args) -> str:
+    """Swap in stub LLM/providers and point all local state at a scratch directory"""
+    scratch = tempfile.mkdtemp(prefix="content_master_bench_")
+    config.OUTPUT_DIR = scratch
+    config.ARTIFACT_DIR = os.path.join(scratch, "artifacts")
+    config.CHECKPOINT_PATH = os.path.join(scratch, "checkpoints.sqlite")
+    config.CHECKPOINTS_ENABLED = args.checkpoints
+    config.RESEARCH_CACHE_MODE = "off"
+
+    # Keep the shared client in the path so its overhead is part of the measurement
+    content_master.llm = LLMClient(StubLLM(args.llm_latency, args.llm_jitter, args.words), metrics=content_master.METRICS)
+    research_providers.PROVIDERS.clear()
+    for name in ("duckduckgo", "wikipedia", "arxiv"):
+        research_providers.register_provider(name, stub_provider(name, args.search_latency, 2))
+    return scratch
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {'p50': 0.0, 'p95': 0.0, 'mean': 0.0}
+    if len(values) == 1:
+        return {'p50': values[0], 'p95': values[0], 'mean': values[0]}
+    cuts = statistics.quantiles(values, n=100, method="inclusive")
+    return {'p50': round(cuts[49], 4), 'p95': round(cuts[94], 4), 'mean': round(statistics.mean(values), 4)}
+
+def run_benchmark(args) -> Dict:
+    scratch = install_stubs(args)
+    content_master.METRICS.reset()
+    content_master.get_workflow()  # compile outside the timed region
+
+    jobs = [(kind, QUERY_TEMPLATES[kind].format(topic=TOPICS[i % len(TOPICS)]))
+            for i in range(args.queries) for kind in args.content_types]
+
+    durations = {kind: [] for kind in args.content_types}
+    failures = []
+
+    def run_one(job):
+        kind, query = job
+        start = time.perf_counter()
+        try:
+            result = content_master.run_content_master(query, formats=args.formats)
+        except Exception as e:
+            failures.append({'query': query, 'error': str(e)})
+            return
+        if result['content_type'] != kind:
+            failures.append({'query': query, 'error': f"classified as {result['content_type']}, expected {kind}"})
+        durations[kind].append(time.perf_counter() - start)
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(run_one, jobs))
+    wall = time.perf_counter() - wall_start
+
+    report = content_master.METRICS.report()
+    nodes = {
+        h['labels']['node']: {'p50': h['p50'], 'p95': h['p95'], 'count': h['count']}
+        for h in report['histograms'] if h['name'] == 'node_duration_seconds'
+    }
+    all_durations = [d for values in durations.values() for d in values]
+    return {
+        'config': {
+            'queries': args.queries, 'content_types': args.content_types, 'formats': args.formats,
+            'concurrency': args.concurrency, 'llm_latency': args.llm_latency, 'llm_jitter': args.llm_jitter,
+            'search_latency': args.search_latency, 'checkpoints': args.checkpoints
+        },
+        'runs': len(all_durations),
+        'failures': failures,
+        'wall_seconds': round(wall, 4),
+        'throughput_per_second': round(len(all_durations) / wall, 4) if wall else 0.0,
+        'end_to_end': percentiles(all_durations),
+        'end_to_end_by_type': {kind: percentiles(values) for kind, values in durations.items()},
+        'nodes': nodes,
+        'scratch_dir': scratch
+    }
+
+def compare(current: Dict, baseline: Dict, threshold: float, min_delta: float = 0.002) -> List[str]:
+    """Latency metrics that grew more than threshold (relative) and min_delta seconds (absolute)"""
+    regressions = []
+
+    def check(label, now, before):
+        if before and now - before > min_delta and (now - before) / before > threshold:
+            regressions.append(f"{label}: {before:.4f}s -> {now:.4f}s ({(now - before) / before:+.1%})")
+
+    for stat in ('p50', 'p95'):
+        check(f"end_to_end {stat}", current['end_to_end'][stat], baseline['end_to_end'][stat])
+        for node, values in current['nodes'].items():
+            if node in baseline['nodes']:
+                check(f"{node} {stat}", values[stat], baseline['nodes'][node][stat])
+    before_tp, now_tp = baseline['throughput_per_second'], current['throughput_per_second']
+    if before_tp and (before_tp - now_tp) / before_tp > threshold:
+        regressions.append(f"throughput: {before_tp:.3f}/s -> {now_tp:.3f}/s")
+    return regressions
+
+def print_report(result: Dict):
+    e2e = result['end_to_end']
+    print(f"{result['runs']} runs in {result['wall_seconds']}s "
+          f"({result['throughput_per_second']}/s), {len(result['failures'])} failures")
+    print(f"end-to-end p50={e2e['p50']}s p95={e2e['p95']}s")
+    for node, values in sorted(result['nodes'].items(), key=lambda item: -item[1]['p95']):
+        print(f"  {node:<20} p50={values['p50']:.4f}s p95={values['p95']:.4f}s n={values['count']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline ContentMaster benchmark with stub LLM and search")
+    parser.add_argument("--queries", type=int, default=5, help="queries per content type")
+    parser.add_argument("--content-types", nargs="+", default=list(QUERY_TEMPLATES), choices=list(QUERY_TEMPLATES))
+    parser.add_argument("--formats", nargs="+", help="force output formats for every run")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    parser.add_argument("--llm-jitter", type=float, default=0.0)
+    parser.add_argument("--search-latency", type=float, default=0.02)
+    parser.add_argument("--words", type=int, default=120, help="words per generated section")
+    parser.add_argument("--checkpoints", action="store_true", help="include SQLite checkpointing")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="baseline results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15)
+    args = parser.parse_args()
+
+    result = run_benchmark(args)
+    print_report(result)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(result, json.load(f), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
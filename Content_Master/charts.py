@@ -0,0 +1,23 @@
+from io import BytesIO
+from typing import List
+
+def render_bar_chart(title: str, labels: List[str], values: List[float], dpi: int) -> bytes:
+    """Render a bar chart to PNG bytes.
+
+    Uses the object-oriented Figure API with an Agg canvas, so no global pyplot
+    state is touched and it is safe to call from worker processes or threads.
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = Figure(figsize=(10, 6))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.bar(labels, values)
+    ax.set_title(title)
+    ax.set_ylabel('Impact Score')
+    ax.set_xlabel('Categories')
+
+    buffer = BytesIO()
+    fig.savefig(buffer, format='png', dpi=dpi, bbox_inches='tight')
+    return buffer.getvalue()
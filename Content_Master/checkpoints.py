@@ -0,0 +1,77 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+import config
+
+_saver = None
+_saver_lock = threading.Lock()
+
+def get_checkpointer():
+    """Durable SQLite checkpointer shared by every run in this process, or None when disabled"""
+    global _saver
+    if not config.CHECKPOINTS_ENABLED:
+        return None
+    with _saver_lock:
+        if _saver is None:
+            from langgraph.checkpoint.sqlite import SqliteSaver
+            os.makedirs(os.path.dirname(config.CHECKPOINT_PATH) or ".", exist_ok=True)
+            conn = sqlite3.connect(config.CHECKPOINT_PATH, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            _saver = SqliteSaver(conn)
+            _saver.setup()
+    return _saver
+
+def thread_config(thread_id: str) -> Dict:
+    return {"configurable": {"thread_id": thread_id}, "recursion_limit": 50}
+
+def thread_ids() -> List[str]:
+    saver = get_checkpointer()
+    if saver is None:
+        return []
+    rows = saver.conn.execute("SELECT DISTINCT thread_id FROM checkpoints").fetchall()
+    return [row[0] for row in rows]
+
+def describe(app, thread_id: str) -> Dict:
+    """Summary of the latest checkpoint for a run: query, progress and what would run next"""
+    snapshot = app.get_state(thread_config(thread_id))
+    values = snapshot.values or {}
+    checkpoint_tuple = get_checkpointer().get_tuple(thread_config(thread_id))
+    return {
+        'thread_id': thread_id,
+        'query': values.get('query', ''),
+        'updated_at': checkpoint_tuple.checkpoint.get('ts', '') if checkpoint_tuple else '',
+        'next': list(snapshot.next),
+        'completed': not snapshot.next and bool(values.get('final_output')),
+        'files_created': (values.get('final_output') or {}).get('files_created', [])
+    }
+
+def list_runs(app) -> List[Dict]:
+    runs = [describe(app, thread_id) for thread_id in thread_ids()]
+    return sorted(runs, key=lambda run: run['updated_at'], reverse=True)
+
+def delete_run(thread_id: str) -> None:
+    saver = get_checkpointer()
+    if hasattr(saver, "delete_thread"):
+        saver.delete_thread(thread_id)
+        return
+    with saver.lock:
+        saver.conn.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+        saver.conn.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+        saver.conn.commit()
+
+def prune(app, thread_ids: Optional[List[str]] = None, older_than_days: Optional[float] = None,
+          completed_only: bool = False) -> List[str]:
+    """Delete checkpoints for the given runs, or for every run matching the filters"""
+    runs = list_runs(app)
+    if thread_ids:
+        runs = [run for run in runs if run['thread_id'] in thread_ids]
+    if completed_only:
+        runs = [run for run in runs if run['completed']]
+    if older_than_days is not None:
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=older_than_days)).isoformat()
+        runs = [run for run in runs if run['updated_at'] and run['updated_at'] < cutoff]
+    for run in runs:
+        delete_run(run['thread_id'])
+    return [run['thread_id'] for run in runs]
@@ -0,0 +1,52 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+def _parse_int_map(value: str) -> dict:
+    """Parse "name=123,other=456" into {"name": 123, "other": 456}"""
+    pairs = (item.split("=", 1) for item in value.split(",") if "=" in item)
+    return {name.strip(): int(number) for name, number in pairs}
+
+# Output
+OUTPUT_DIR = os.path.abspath(os.getenv("CONTENT_MASTER_OUTPUT_DIR", "output"))
+ARTIFACT_DIR = os.getenv("CONTENT_MASTER_ARTIFACT_DIR", os.path.join(OUTPUT_DIR, "artifacts"))
+
+# Content generation
+SECTION_CONCURRENCY = int(os.getenv("CONTENT_MASTER_SECTION_CONCURRENCY", "4"))
+# Token budget for the source block of each section prompt
+PROMPT_SOURCE_TOKEN_BUDGET = int(os.getenv("CONTENT_MASTER_PROMPT_SOURCE_TOKENS", "300"))
+PROMPT_MAX_SOURCES = int(os.getenv("CONTENT_MASTER_PROMPT_MAX_SOURCES", "5"))
+
+# Rendering
+RENDER_WORKERS = int(os.getenv("CONTENT_MASTER_RENDER_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Chart DPI per output format; the PDF embeds the chart at 400x240 so it needs far less than 300
+CHART_DPI = {
+    "presentation": 200,
+    "document": 150,
+    "webpage": 100,
+    **_parse_int_map(os.getenv("CONTENT_MASTER_CHART_DPI", ""))
+}
+
+# Research
+RESEARCH_DEADLINE = float(os.getenv("CONTENT_MASTER_RESEARCH_DEADLINE", "8"))
+
+# Research cache: "readwrite", "cache_only" (offline, never hits the network) or "off"
+RESEARCH_CACHE_MODE = os.getenv("CONTENT_MASTER_RESEARCH_CACHE", "readwrite")
+RESEARCH_CACHE_PATH = os.getenv("CONTENT_MASTER_RESEARCH_CACHE_PATH", os.path.join(OUTPUT_DIR, "research_cache.sqlite"))
+RESEARCH_CACHE_TTLS = {
+    "duckduckgo": 6 * 3600,
+    "wikipedia": 7 * 86400,
+    "arxiv": 86400,
+    **_parse_int_map(os.getenv("CONTENT_MASTER_RESEARCH_CACHE_TTLS", ""))
+}
+RESEARCH_CACHE_DEFAULT_TTL = int(os.getenv("CONTENT_MASTER_RESEARCH_CACHE_DEFAULT_TTL", "86400"))
+RESEARCH_CACHE_MAX_ENTRIES = int(os.getenv("CONTENT_MASTER_RESEARCH_CACHE_MAX_ENTRIES", "5000"))
+RESEARCH_CACHE_MAX_BYTES = int(os.getenv("CONTENT_MASTER_RESEARCH_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+
+# Checkpoints: completed nodes are persisted so failed or interrupted runs can resume
+CHECKPOINTS_ENABLED = os.getenv("CONTENT_MASTER_CHECKPOINTS", "on").lower() not in ("0", "off", "false")
+CHECKPOINT_PATH = os.getenv("CONTENT_MASTER_CHECKPOINT_PATH", os.path.join(OUTPUT_DIR, "checkpoints.sqlite"))
+
+# LLM response cache (opt-in with LLM_CACHE=on); this is the default file for it
+LLM_CACHE_PATH = os.path.join(OUTPUT_DIR, "llm_cache.sqlite")
@@ -1,30 +1,47 @@
 import os
-import requests
-from bs4 import BeautifulSoup
+import sys
+import logging
+import contextvars
+import time
+import threading
+import uuid
 from typing import Dict, List
 from langgraph.graph import StateGraph, END
 from langchain_openai import ChatOpenAI
 from state import ContentState
+import config
 import json
-import matplotlib.pyplot as plt
-from io import BytesIO
-import base64
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
-from ddgs import DDGS
-import wikipediaapi
-from pptx import Presentation
-from pptx.util import Inches
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image
-from reportlab.lib.styles import getSampleStyleSheet
+import research_providers
+import research_cache
+import charts
+import workers
+import artifacts
+import renderers
+import checkpoints
+import prompt_budget
+import source_quality
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from shared.instrumentation import MetricsRegistry, token_usage_handler
+from shared.llm_client import LLMClient
 
 load_dotenv()
-llm = ChatOpenAI(model="gpt-4", temperature=0.7)
+logger = logging.getLogger("content_master")
+METRICS = MetricsRegistry("content_master")
+llm = LLMClient.from_env(
+    ChatOpenAI(model="gpt-4", temperature=0.7, max_retries=0, callbacks=[token_usage_handler(METRICS)]),
+    metrics=METRICS,
+    count_tokens=prompt_budget.count_tokens,
+    cache_path=config.LLM_CACHE_PATH
+)
 
 def query_analyzer(state: ContentState) -> ContentState:
-    print("Executing: Query Analyzer")
+    logger.info("Executing: Query Analyzer")
     prompt = f"Analyze this query and determine content type (presentation/document/webpage): {state.query}"
-    response = llm.invoke(prompt)
+    # Only keywords are read from the answer, so a cached sample is as good as a fresh one
+    response = llm.invoke(prompt, force_cache=True)
     
     if "presentation" in response.content.lower() or "slides" in response.content.lower():
         state.content_type = "presentation"
@@ -33,121 +50,80 @@ def query_analyzer(state: ContentState) -> ContentState:
     else:
         state.content_type = "webpage"
     
-    print(f"Content type determined: {state.content_type}")
+    logger.info("Content type determined: %s", state.content_type, extra={'content_type': state.content_type})
     return state
 
-def research_agent(state: ContentState) -> ContentState:
-    print("Executing: Research Agent")
-    results = []
+def gather_research(query: str):
+    """Serve providers from the research cache and fetch the rest concurrently.
+
+    Returns (results_by_provider, provider_stats) in provider registration order.
+    """
+    cache = research_cache.get_cache()
+    cached, stats, pending = {}, {}, {}
+    for name, provider in research_providers.PROVIDERS.items():
+        hit = cache.get(name, query) if cache else None
+        if hit is not None:
+            cached[name] = hit
+            stats[name] = {'status': 'cached', 'latency': 0.0, 'results': len(hit)}
+        elif config.RESEARCH_CACHE_MODE == "cache_only":
+            stats[name] = {'status': 'cache_miss', 'latency': 0.0, 'results': 0}
+        else:
+            pending[name] = provider
     
-    try:
-        # DuckDuckGo web search
-        print("Searching DuckDuckGo...")
-        ddgs = DDGS()
-        web_results = ddgs.text(state.query, max_results=3)
-        
-        for result in web_results:
-            results.append({
-                'title': result.get('title', ''),
-                'url': result.get('href', ''),
-                'snippet': result.get('body', '')[:200] + '...' if len(result.get('body', '')) > 200 else result.get('body', '')
-            })
-        
-        print(f"Found {len(results)} DuckDuckGo results")
-        
-    except Exception as e:
-        print(f"DuckDuckGo search failed: {e}")
+    fetched, fetched_stats = research_providers.run_providers(query, config.RESEARCH_DEADLINE, pending)
+    stats.update(fetched_stats)
+    if cache:
+        for name, provider_results in fetched.items():
+            cache.put(name, query, provider_results)
     
-    try:
-        # Wikipedia search
-        print("Searching Wikipedia...")
-        wiki = wikipediaapi.Wikipedia(
-            user_agent='ContentMaster/1.0 (https://github.com/contentmaster)',
-            language='en'
-        )
-        search_terms = state.query.split()[:2]  # Use first 2 words for better Wikipedia results
-        wiki_query = ' '.join(search_terms)
-        
-        page = wiki.page(wiki_query)
-        if page.exists():
-            summary = page.summary[:300] + '...' if len(page.summary) > 300 else page.summary
-            results.append({
-                'title': page.title,
-                'url': page.fullurl,
-                'snippet': summary
-            })
-            print("Found Wikipedia article")
-        else:
-            # Try searching for related pages
-            wiki_search_url = f"https://en.wikipedia.org/api/rest_v1/page/summary/{wiki_query.replace(' ', '_')}"
-            try:
-                response = requests.get(wiki_search_url, timeout=5)
-                if response.status_code == 200:
-                    data = response.json()
-                    results.append({
-                        'title': data.get('title', ''),
-                        'url': data.get('content_urls', {}).get('desktop', {}).get('page', ''),
-                        'snippet': data.get('extract', '')[:300] + '...' if len(data.get('extract', '')) > 300 else data.get('extract', '')
-                    })
-                    print("Found Wikipedia summary")
-            except:
-                pass
-                
-    except Exception as e:
-        print(f"Wikipedia search failed: {e}")
+    merged = {**cached, **fetched}
+    results_by_provider = {name: merged[name] for name in research_providers.PROVIDERS if name in merged}
+    return results_by_provider, {name: stats[name] for name in research_providers.PROVIDERS if name in stats}
+
+def research_agent(state: ContentState) -> ContentState:
+    logger.info("Executing: Research Agent")
+    logger.debug("Searching %s (deadline %ss, cache %s)", ', '.join(research_providers.PROVIDERS), config.RESEARCH_DEADLINE, config.RESEARCH_CACHE_MODE)
+    results_by_provider, provider_stats = gather_research(state.query)
     
-    try:
-        # ArXiv API for academic papers
-        print("Searching ArXiv for academic papers...")
-        arxiv_url = f"http://export.arxiv.org/api/query?search_query=all:{state.query}&max_results=2"
-        response = requests.get(arxiv_url, timeout=5)
-        if response.status_code == 200:
-            from xml.etree import ElementTree as ET
-            root = ET.fromstring(response.content)
-            namespace = {'atom': 'http://www.w3.org/2005/Atom'}
-            
-            for entry in root.findall('atom:entry', namespace)[:2]:
-                title = entry.find('atom:title', namespace)
-                link = entry.find('atom:id', namespace)
-                summary = entry.find('atom:summary', namespace)
-                
-                if title is not None and link is not None:
-                    results.append({
-                        'title': title.text.strip(),
-                        'url': link.text.strip(),
-                        'snippet': summary.text.strip()[:300] + '...' if summary is not None and len(summary.text.strip()) > 300 else (summary.text.strip() if summary is not None else '')
-                    })
-            print(f"Found ArXiv papers")
-    except Exception as e:
-        print(f"ArXiv search failed: {e}")
+    results = []
+    for name, provider_results in results_by_provider.items():
+        results.extend(provider_results)
+        logger.info("Found %d %s results (%s)", len(provider_results), name, provider_stats[name]['status'])
+    for name, stats in provider_stats.items():
+        if stats['status'] not in ('ok', 'cached'):
+            logger.warning("%s search %s after %ss %s", name, stats['status'], stats['latency'], stats.get('error', ''),
+                           extra={'provider': name, **stats})
     
     # Fallback if no results found
     if not results:
-        print("Using fallback research data...")
+        logger.warning("Using fallback research data...")
         results = [
             {'title': f'Academic Research: {state.query}', 'url': 'https://scholar.google.com', 'snippet': f'Academic research and scholarly articles about {state.query}'},
             {'title': f'Industry Analysis: {state.query}', 'url': 'https://industry-reports.com', 'snippet': f'Industry analysis and market research for {state.query}'},
         ]
     
+    for name, stats in provider_stats.items():
+        METRICS.observe("research_provider_seconds", stats['latency'], {'provider': name, 'status': stats['status']})
+        METRICS.inc("research_provider_results_total", {'provider': name}, stats['results'])
+    
     state.search_results = results
-    print(f"Found {len(state.search_results)} total search results")
+    state.research_stats = {
+        'providers': provider_stats,
+        'timeouts': sum(1 for stats in provider_stats.values() if stats['status'] == 'timeout')
+    }
+    logger.info("Found %d total search results", len(state.search_results))
     return state
 
 def source_verifier(state: ContentState) -> ContentState:
-    print("Executing: Source Verifier")
-    verified = []
-    for result in state.search_results:
-        score = 0.8 if any(domain in result['url'] for domain in ['edu', 'gov', 'org']) else 0.6
-        verified.append({**result, 'credibility_score': score})
-    
-    state.verified_sources = sorted(verified, key=lambda x: x['credibility_score'], reverse=True)
+    logger.info("Executing: Source Verifier")
+    state.verified_sources = source_quality.verify_sources(state.search_results)
     state.quality_score = sum(s['credibility_score'] for s in state.verified_sources) / len(state.verified_sources) if state.verified_sources else 0
     
-    print(f"Quality score: {state.quality_score}")
+    logger.info("Kept %d of %d sources, quality score: %s", len(state.verified_sources), len(state.search_results), state.quality_score)
     return state
 
 def content_planner(state: ContentState) -> ContentState:
-    print("Executing: Content Planner")
+    logger.info("Executing: Content Planner")
     if state.content_type == "presentation":
         state.content_plan = {
             'sections': ['Title', 'Introduction', 'Main Points', 'Data/Statistics', 'Conclusion'],
@@ -164,72 +140,114 @@ def content_planner(state: ContentState) -> ContentState:
             'layout': 'single_page'
         }
     
-    print(f"Plan created with {len(state.content_plan['sections'])} sections")
+    logger.info("Plan created with %d sections", len(state.content_plan['sections']))
     return state
 
+def generate_section(state: ContentState, section: str, sources_text: str) -> str:
+    """Generate a single section; transient LLM errors are retried by the shared client"""
+    prompt = f"Generate {section} content for {state.content_type} about: {state.query}\nBased on: {sources_text}"
+    return llm.invoke(prompt).content
+
+def _stream_writer():
+    """LangGraph custom-stream writer for the current run, or a no-op outside streaming"""
+    try:
+        from langgraph.config import get_stream_writer
+        return get_stream_writer()
+    except (ImportError, RuntimeError):
+        return lambda chunk: None
+
 def content_generator(state: ContentState) -> ContentState:
-    print("Executing: Content Generator")
-    content = {}
-    sources_text = "\n".join([f"- {s['title']}: {s['snippet']}" for s in state.verified_sources[:3]])
-    
-    for section in state.content_plan['sections']:
-        prompt = f"Generate {section} content for {state.content_type} about: {state.query}\nBased on: {sources_text}"
-        response = llm.invoke(prompt)
-        content[section] = response.content
+    logger.info("Executing: Content Generator")
+    sections = state.content_plan['sections']
     
+    # Each section gets its own source block, ranked for that section and trimmed to the token budget
+    source_blocks, state.prompt_stats = prompt_budget.section_source_blocks(
+        state.verified_sources, state.query, sections, config.PROMPT_SOURCE_TOKEN_BUDGET, config.PROMPT_MAX_SOURCES
+    )
+    source_tokens = state.prompt_stats['source_tokens']
+    METRICS.inc("prompt_source_tokens_total", amount=source_tokens)
+    METRICS.inc("prompt_tokens_saved_total", amount=state.prompt_stats['tokens_saved'])
+    logger.info("Source blocks use %d tokens (%d saved)", source_tokens, state.prompt_stats['tokens_saved'])
+    
+    emit = _stream_writer()
+    page = None
+    if state.stream and "webpage" in output_formats(state):
+        page = renderers.StreamingWebpage(state, resolve_output_dir(state), sections)
+        state.stream_path = page.path
+        emit({'event': 'stream_started', 'path': page.path})
+    
+    max_workers = max(1, min(config.SECTION_CONCURRENCY, len(sections)))
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # Each task runs in a copy of this context so token usage is attributed to this node
+            futures = {executor.submit(contextvars.copy_context().run, generate_section, state, section, source_blocks[section][0]): section
+                       for section in sections}
+            completed = {}
+            for future in as_completed(futures):
+                section = futures[future]
+                completed[section] = future.result()
+                if page:
+                    page.add(section, completed[section])
+                emit({'event': 'section', 'section': section, 'index': sections.index(section), 'content': completed[section]})
+    finally:
+        if page:
+            page.close()
+    
+    # Order by plan so generated_content stays deterministic
+    content = {section: completed[section] for section in sections}
     state.generated_content = content
-    print(f"Generated content for {len(content)} sections")
+    logger.info("Generated content for %d sections", len(content))
     return state
 
 def visual_creator(state: ContentState) -> ContentState:
-    print("Executing: Visual Creator")
+    logger.info("Executing: Visual Creator")
     visuals = []
     
-    if state.content_type in ["presentation", "document"]:
-        # Create a chart image file
-        plt.figure(figsize=(10, 6))
-        plt.bar(['Current Trends', 'Future Outlook', 'Key Benefits'], [30, 45, 25])
-        plt.title(f"Analysis Overview: {state.query}")
-        plt.ylabel('Impact Score')
-        plt.xlabel('Categories')
-        
-        clean_query = "".join(c for c in state.query if c.isalnum() or c in (' ', '-', '_')).replace(' ', '_')
-        chart_filename = f"chart_{clean_query}.png"
-        plt.savefig(chart_filename, dpi=300, bbox_inches='tight')
-        
-        # Also save to buffer for embedding
-        buffer = BytesIO()
-        plt.savefig(buffer, format='png', dpi=300, bbox_inches='tight')
-        buffer.seek(0)
-        img_data = base64.b64encode(buffer.getvalue()).decode()
-        plt.close()
+    chart_formats = [fmt for fmt in output_formats(state) if fmt in ("presentation", "document")]
+    if chart_formats:
+        # Render in a worker process; state only keeps a reference into the artifact store
+        dpi = max(config.CHART_DPI.get(fmt, 150) for fmt in chart_formats)
+        png = workers.submit(
+            charts.render_bar_chart,
+            f"Analysis Overview: {state.query}",
+            ['Current Trends', 'Future Outlook', 'Key Benefits'],
+            [30, 45, 25],
+            dpi
+        ).result()
         
+        artifact = artifacts.get_store().put(png, 'image/png')
         visuals.append({
             'type': 'chart',
-            'filename': chart_filename,
-            'data': img_data,
+            'artifact': artifact,
             'caption': f'Analysis overview for {state.query}'
         })
         
-        print(f"Created chart file: {chart_filename}")
+        logger.info("Created chart artifact: %s (%s dpi, %s bytes)", artifact['path'], dpi, artifact['size'])
     
     state.visuals = visuals
-    print(f"Created {len(visuals)} visuals")
+    logger.info("Created %d visuals", len(visuals))
     return state
 
 def template_selector(state: ContentState) -> ContentState:
-    print("Executing: Template Selector")
+    logger.info("Executing: Template Selector")
     templates = {
         "presentation": "modern_slides",
         "document": "professional_report",
         "webpage": "clean_web"
     }
     state.template = templates.get(state.content_type, "default")
-    print(f"Selected template: {state.template}")
+    logger.info("Selected template: %s", state.template)
     return state
 
+def resolve_output_dir(state: ContentState) -> str:
+    return os.path.abspath(state.output_dir or config.OUTPUT_DIR)
+
+def output_formats(state: ContentState) -> List[str]:
+    """Formats requested for this run, defaulting to the analyzed content type"""
+    return renderers.normalize_formats(state.output_formats) if state.output_formats else [state.content_type]
+
 def content_assembler(state: ContentState) -> ContentState:
-    print("Executing: Content Assembler")
+    logger.info("Executing: Content Assembler")
     output = {
         'type': state.content_type,
         'template': state.template,
@@ -242,212 +260,57 @@ def content_assembler(state: ContentState) -> ContentState:
         }
     }
     
-    # Create actual files based on content type
-    files_created = []
-    
-    if state.content_type == "presentation":
-        filename = create_presentation_file(state)
-        files_created.append(filename)
-        print(f"Created PowerPoint presentation: {filename}")
-        
-    elif state.content_type == "document":
-        filename = create_document_file(state)
-        files_created.append(filename)
-        print(f"Created PDF document: {filename}")
-        
-    elif state.content_type == "webpage":
-        filename = create_webpage_file(state)
-        files_created.append(filename)
-        print(f"Created HTML webpage: {filename}")
+    # Create actual files for every requested format
+    formats = output_formats(state)
+    output_dir = resolve_output_dir(state)
+    streamed = bool(state.stream_path)
+    if streamed:
+        formats = [fmt for fmt in formats if fmt != 'webpage']
+    files, timings = renderers.render_formats(state, formats, output_dir)
+    if streamed:
+        # The webpage body was streamed during generation; the tail goes last so a failed
+        # render above can be resumed without closing the page twice
+        start = time.perf_counter()
+        files['webpage'] = renderers.finish_streamed_webpage(state)
+        timings['webpage'] = round(time.perf_counter() - start, 3)
+    for fmt, filename in files.items():
+        logger.info("Created %s file: %s (%ss)", fmt, filename, timings[fmt])
+    files_created = list(files.values())
+    output['render_timings'] = timings
     
     output['files_created'] = files_created
     state.final_output = output
-    print(f"Content assembly completed! Created {len(files_created)} files")
+    logger.info("Content assembly completed! Created %d files", len(files_created))
     return state
 
-def create_presentation_file(state: ContentState) -> str:
-    """Create actual PowerPoint presentation file"""
-    prs = Presentation()
-    
-    # Title slide
-    title_slide_layout = prs.slide_layouts[0]
-    slide = prs.slides.add_slide(title_slide_layout)
-    title = slide.shapes.title
-    subtitle = slide.placeholders[1]
-    
-    title.text = state.query.title()
-    subtitle.text = f"Research-backed presentation\nSources: {len(state.verified_sources)}"
-    
-    # Content slides
-    for section, content in state.generated_content.items():
-        bullet_slide_layout = prs.slide_layouts[1]
-        slide = prs.slides.add_slide(bullet_slide_layout)
-        shapes = slide.shapes
-        
-        title_shape = shapes.title
-        body_shape = shapes.placeholders[1]
-        
-        title_shape.text = section
-        tf = body_shape.text_frame
-        tf.text = content[:500] + "..." if len(content) > 500 else content
-    
-    # Add chart if available
-    if state.visuals:
-        chart_slide_layout = prs.slide_layouts[5]
-        slide = prs.slides.add_slide(chart_slide_layout)
-        title_shape = slide.shapes.title
-        title_shape.text = "Data Analysis"
-        
-        chart_filename = state.visuals[0].get('filename')
-        if chart_filename and os.path.exists(chart_filename):
-            slide.shapes.add_picture(chart_filename, Inches(1), Inches(2), Inches(8), Inches(4))
-    
-    # Sources slide
-    bullet_slide_layout = prs.slide_layouts[1]
-    slide = prs.slides.add_slide(bullet_slide_layout)
-    title_shape = slide.shapes.title
-    body_shape = slide.placeholders[1]
-    
-    title_shape.text = "Sources"
-    tf = body_shape.text_frame
-    for i, source in enumerate(state.verified_sources[:5]):
-        p = tf.paragraphs[0] if i == 0 else tf.add_paragraph()
-        p.text = f"• {source['title']}: {source['url']}"
-    
-    clean_query = "".join(c for c in state.query if c.isalnum() or c in (' ', '-', '_')).replace(' ', '_')
-    filename = f"{clean_query}_presentation.pptx"
-    prs.save(filename)
-    return filename
-
-def create_document_file(state: ContentState) -> str:
-    """Create actual PDF document file"""
-    clean_query = "".join(c for c in state.query if c.isalnum() or c in (' ', '-', '_')).replace(' ', '_')
-    filename = f"{clean_query}_document.pdf"
-    doc = SimpleDocTemplate(filename, pagesize=letter)
-    styles = getSampleStyleSheet()
-    story = []
-    
-    # Title
-    title = Paragraph(state.query.title(), styles['Title'])
-    story.append(title)
-    story.append(Spacer(1, 12))
-    
-    # Content sections
-    for section, content in state.generated_content.items():
-        section_title = Paragraph(section, styles['Heading2'])
-        story.append(section_title)
-        
-        content_para = Paragraph(content, styles['Normal'])
-        story.append(content_para)
-        story.append(Spacer(1, 12))
-    
-    # Add chart if available
-    if state.visuals:
-        chart_filename = state.visuals[0].get('filename')
-        if chart_filename and os.path.exists(chart_filename):
-            story.append(Paragraph("Data Analysis", styles['Heading2']))
-            img = Image(chart_filename, width=400, height=240)
-            story.append(img)
-            story.append(Spacer(1, 12))
-    
-    # Sources
-    story.append(Paragraph("Sources", styles['Heading2']))
-    for source in state.verified_sources:
-        source_para = Paragraph(f"• {source['title']}: {source['url']}", styles['Normal'])
-        story.append(source_para)
-    
-    doc.build(story)
-    return filename
-
-def create_webpage_file(state: ContentState) -> str:
-    """Create actual HTML webpage file"""
-    clean_query = "".join(c for c in state.query if c.isalnum() or c in (' ', '-', '_')).replace(' ', '_')
-    filename = f"{clean_query}_webpage.html"
-    
-    html_content = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>{state.query.title()}</title>
-        <style>
-            body {{ font-family: Arial, sans-serif; margin: 40px; line-height: 1.6; }}
-            h1 {{ color: #333; border-bottom: 2px solid #007acc; }}
-            h2 {{ color: #007acc; }}
-            .section {{ margin-bottom: 30px; }}
-            .sources {{ background: #f5f5f5; padding: 20px; }}
-            img {{ max-width: 100%; height: auto; }}
-        </style>
-    </head>
-    <body>
-        <h1>{state.query.title()}</h1>
-        <p><em>Research-backed content from {len(state.verified_sources)} sources</em></p>
-    """
-    
-    # Content sections
-    for section, content in state.generated_content.items():
-        html_content += f"""
-        <div class="section">
-            <h2>{section}</h2>
-            <p>{content}</p>
-        </div>
-        """
-    
-    # Add chart if available
-    if state.visuals:
-        chart_filename = state.visuals[0].get('filename')
-        if chart_filename and os.path.exists(chart_filename):
-            html_content += f"""
-            <div class="section">
-                <h2>Data Analysis</h2>
-                <img src="{chart_filename}" alt="Analysis Chart">
-            </div>
-            """
-    
-    # Sources
-    html_content += """
-        <div class="sources">
-            <h2>Sources</h2>
-            <ul>
-    """
-    for source in state.verified_sources:
-        html_content += f'<li><a href="{source["url"]}">{source["title"]}</a></li>'
-    
-    html_content += """
-            </ul>
-        </div>
-    </body>
-    </html>
-    """
-    
-    with open(filename, 'w', encoding='utf-8') as f:
-        f.write(html_content)
-    
-    return filename
-
 def should_retry_research(state: ContentState) -> str:
-    print(f"Research check: results={len(state.search_results)}")
+    logger.debug("Research check: results=%d", len(state.search_results))
     return "proceed"
 
 def should_retry_verification(state: ContentState) -> str:
-    print(f"Verification check: quality_score={state.quality_score}")
+    logger.debug("Verification check: quality_score=%s", state.quality_score)
     return "proceed"
 
 def needs_visuals(state: ContentState) -> str:
-    decision = "with_visuals" if state.content_type in ["presentation", "document"] else "no_visuals"
-    print(f"Visuals check: content_type={state.content_type}, decision={decision}")
+    decision = "with_visuals" if set(output_formats(state)) & {"presentation", "document"} else "no_visuals"
+    logger.debug("Visuals check: content_type=%s, decision=%s", state.content_type, decision)
     return decision
 
-def create_workflow():
+def create_workflow(checkpointer=None):
     workflow = StateGraph(ContentState)
     
-    workflow.add_node("query_analyzer", query_analyzer)
-    workflow.add_node("research_agent", research_agent)
-    workflow.add_node("source_verifier", source_verifier)
-    workflow.add_node("content_planner", content_planner)
-    workflow.add_node("content_generator", content_generator)
-    workflow.add_node("visual_creator", visual_creator)
-    workflow.add_node("template_selector", template_selector)
-    workflow.add_node("content_assembler", content_assembler)
+    nodes = {
+        "query_analyzer": query_analyzer,
+        "research_agent": research_agent,
+        "source_verifier": source_verifier,
+        "content_planner": content_planner,
+        "content_generator": content_generator,
+        "visual_creator": visual_creator,
+        "template_selector": template_selector,
+        "content_assembler": content_assembler,
+    }
+    for name, node in nodes.items():
+        workflow.add_node(name, METRICS.instrument(name, node, logger))
     
     workflow.set_entry_point("query_analyzer")
     
@@ -472,11 +335,55 @@ def create_workflow():
     workflow.add_edge("template_selector", "content_assembler")
     workflow.add_edge("content_assembler", END)
     
-    return workflow.compile()
+    return workflow.compile(checkpointer=checkpointer)
+
+_workflow = None
+_workflow_lock = threading.Lock()
+
+def get_workflow():
+    """Compiled workflow, built once per process and shared across runs"""
+    global _workflow
+    with _workflow_lock:
+        if _workflow is None:
+            _workflow = create_workflow(checkpoints.get_checkpointer())
+    return _workflow
+
+def run_config(thread_id: str = None) -> Dict:
+    """Graph config for a run; every run gets its own checkpoint thread so it can be resumed"""
+    return checkpoints.thread_config(thread_id or uuid.uuid4().hex)
+
+def run_content_master(query: str, formats: List[str] = None, output_dir: str = None, thread_id: str = None):
+    app = get_workflow()
+    # Validate formats up front rather than after the LLM calls
+    formats = renderers.normalize_formats(formats or [])
+    initial_state = ContentState(query=query, output_formats=formats, output_dir=output_dir or "")
+    result = app.invoke(initial_state, config=run_config(thread_id))
+    return result
 
-def run_content_master(query: str):
-    app = create_workflow()
-    initial_state = ContentState(query=query)
-    config = {"recursion_limit": 50}
-    result = app.invoke(initial_state, config=config)
-    return result 
\ No newline at end of file
+def resume_content_master(thread_id: str):
+    """Continue a failed or interrupted run from its last completed node"""
+    app = get_workflow()
+    if not app.get_state(checkpoints.thread_config(thread_id)).next:
+        raise ValueError(f"Run {thread_id} has nothing left to resume")
+    return app.invoke(None, config=checkpoints.thread_config(thread_id))
+
+def stream_content_master(query: str, formats: List[str] = None, output_dir: str = None, thread_id: str = None):
+    """Run the workflow, yielding events as it progresses.
+
+    Yields ('section', {...}) as each section is generated (and, for webpages,
+    already flushed to disk), ('stream_started', {...}) once the webpage file
+    exists, ('node', {...}) after every node and finally ('result', state).
+    """
+    app = get_workflow()
+    formats = renderers.normalize_formats(formats or [])
+    initial_state = ContentState(query=query, output_formats=formats, output_dir=output_dir or "", stream=True)
+    result = None
+    for mode, chunk in app.stream(initial_state, config=run_config(thread_id), stream_mode=["custom", "updates", "values"]):
+        if mode == "custom":
+            yield chunk['event'], chunk
+        elif mode == "updates":
+            for node in chunk:
+                yield 'node', {'node': node}
+        else:
+            result = chunk
+    yield 'result', result
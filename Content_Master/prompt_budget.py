@@ -0,0 +1,97 @@
+import math
+from functools import lru_cache
+from typing import Dict, List, Tuple
+from text_similarity import jaccard, shingles, words
+
+# Common words carry no relevance signal when ranking snippets against a query
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is", "it", "of", "on",
+    "or", "that", "the", "this", "to", "with", "about", "create", "generate", "build", "make",
+}
+# Sources the prompts used to include verbatim before budgeting; the baseline for tokens saved
+UNTRIMMED_SOURCES = 3
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+        return tiktoken.encoding_for_model("gpt-4")
+    except Exception:
+        return None
+
+def count_tokens(text: str) -> int:
+    """Local token count with tiktoken, falling back to a ~4 characters per token estimate"""
+    encoding = _encoding()
+    if encoding is None:
+        return math.ceil(len(text) / 4)
+    return len(encoding.encode(text))
+
+def source_line(source: Dict) -> str:
+    return f"- {source['title']}: {source['snippet']}"
+
+def _trim_to_tokens(text: str, budget: int) -> str:
+    """Cut text at a word boundary so it fits within budget tokens"""
+    kept = []
+    for word in text.split():
+        if count_tokens(" ".join(kept + [word, "..."])) > budget:
+            break
+        kept.append(word)
+    return " ".join(kept) + "..." if kept else ""
+
+def rank_sources(sources: List[Dict], query: str, section: str) -> List[Dict]:
+    """Order sources by credibility weighted by term overlap with the query and section"""
+    terms = {w for w in words(f"{query} {section}") if w not in STOPWORDS}
+
+    def score(source):
+        text_terms = set(words(f"{source.get('title', '')} {source.get('snippet', '')}"))
+        relevance = len(terms & text_terms) / len(terms) if terms else 0.0
+        return source.get('credibility_score', 0.5) * (0.5 + relevance)
+
+    return sorted(sources, key=score, reverse=True)
+
+def assemble_sources(sources: List[Dict], query: str, section: str, budget: int,
+                     max_sources: int, duplicate_threshold: float = 0.6) -> Tuple[str, int]:
+    """Build the "Based on:" source block for one section prompt.
+
+    Sources are ranked for the section, near-duplicate snippets are skipped, and
+    lines are added until the token budget is spent (the last one trimmed to fit).
+    Returns (text, tokens).
+    """
+    lines, used, kept_shingles = [], 0, []
+    for source in rank_sources(sources, query, section):
+        separator = 1 if lines else 0  # newline before every line but the first
+        if len(lines) >= max_sources or used + separator >= budget:
+            break
+        snippet_shingles = shingles(source.get('snippet', ''))
+        if any(jaccard(snippet_shingles, seen) >= duplicate_threshold for seen in kept_shingles):
+            continue
+        line = source_line(source)
+        tokens = count_tokens(line)
+        if used + separator + tokens > budget:
+            line = _trim_to_tokens(line, budget - used - separator)
+            if not line:
+                break
+            tokens = count_tokens(line)
+        lines.append(line)
+        kept_shingles.append(snippet_shingles)
+        used += separator + tokens
+    return "\n".join(lines), used
+
+def section_source_blocks(sources: List[Dict], query: str, sections: List[str], budget: int,
+                          max_sources: int) -> Tuple[Dict[str, Tuple[str, int]], Dict]:
+    """Source block for every section plus token stats against the untrimmed top-3 block.
+
+    Each section's budget is capped at the untrimmed block's size, so budgeting
+    never makes a prompt longer than it was. Returns ({section: (text, tokens)}, stats).
+    """
+    untrimmed = count_tokens("\n".join(source_line(s) for s in sources[:UNTRIMMED_SOURCES]))
+    section_budget = min(budget, untrimmed)
+    blocks = {section: assemble_sources(sources, query, section, section_budget, max_sources) for section in sections}
+    source_tokens = sum(tokens for _, tokens in blocks.values())
+    stats = {
+        'source_token_budget': section_budget,
+        'source_tokens': source_tokens,
+        'untrimmed_source_tokens': untrimmed * len(sections),
+        'tokens_saved': untrimmed * len(sections) - source_tokens
+    }
+    return blocks, stats
@@ -0,0 +1,263 @@
+import os
+import time
+from typing import Dict, List, Tuple
+from state import ContentState
+import artifacts
+import workers
+
+def output_path(query: str, suffix: str, output_dir: str) -> str:
+    clean_query = "".join(c for c in query if c.isalnum() or c in (' ', '-', '_')).replace(' ', '_')
+    os.makedirs(output_dir, exist_ok=True)
+    return os.path.join(output_dir, f"{clean_query}_{suffix}")
+
+def create_presentation_file(state: ContentState, output_dir: str) -> str:
+    """Create actual PowerPoint presentation file"""
+    from pptx import Presentation
+    from pptx.util import Inches
+    
+    prs = Presentation()
+    
+    # Title slide
+    title_slide_layout = prs.slide_layouts[0]
+    slide = prs.slides.add_slide(title_slide_layout)
+    title = slide.shapes.title
+    subtitle = slide.placeholders[1]
+    
+    title.text = state.query.title()
+    subtitle.text = f"Research-backed presentation\nSources: {len(state.verified_sources)}"
+    
+    # Content slides
+    for section, content in state.generated_content.items():
+        bullet_slide_layout = prs.slide_layouts[1]
+        slide = prs.slides.add_slide(bullet_slide_layout)
+        shapes = slide.shapes
+        
+        title_shape = shapes.title
+        body_shape = shapes.placeholders[1]
+        
+        title_shape.text = section
+        tf = body_shape.text_frame
+        tf.text = content[:500] + "..." if len(content) > 500 else content
+    
+    # Add chart if available
+    if state.visuals:
+        chart_slide_layout = prs.slide_layouts[5]
+        slide = prs.slides.add_slide(chart_slide_layout)
+        title_shape = slide.shapes.title
+        title_shape.text = "Data Analysis"
+        
+        chart_path = artifacts.resolve_path(state.visuals[0])
+        if chart_path:
+            slide.shapes.add_picture(chart_path, Inches(1), Inches(2), Inches(8), Inches(4))
+    
+    # Sources slide
+    bullet_slide_layout = prs.slide_layouts[1]
+    slide = prs.slides.add_slide(bullet_slide_layout)
+    title_shape = slide.shapes.title
+    body_shape = slide.placeholders[1]
+    
+    title_shape.text = "Sources"
+    tf = body_shape.text_frame
+    for i, source in enumerate(state.verified_sources[:5]):
+        p = tf.paragraphs[0] if i == 0 else tf.add_paragraph()
+        p.text = f"• {source['title']}: {source['url']}"
+    
+    filename = output_path(state.query, "presentation.pptx", output_dir)
+    prs.save(filename)
+    return filename
+
+def create_document_file(state: ContentState, output_dir: str) -> str:
+    """Create actual PDF document file"""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image
+    from reportlab.lib.styles import getSampleStyleSheet
+    
+    filename = output_path(state.query, "document.pdf", output_dir)
+    doc = SimpleDocTemplate(filename, pagesize=letter)
+    styles = getSampleStyleSheet()
+    story = []
+    
+    # Title
+    title = Paragraph(state.query.title(), styles['Title'])
+    story.append(title)
+    story.append(Spacer(1, 12))
+    
+    # Content sections
+    for section, content in state.generated_content.items():
+        section_title = Paragraph(section, styles['Heading2'])
+        story.append(section_title)
+        
+        content_para = Paragraph(content, styles['Normal'])
+        story.append(content_para)
+        story.append(Spacer(1, 12))
+    
+    # Add chart if available
+    if state.visuals:
+        chart_path = artifacts.resolve_path(state.visuals[0])
+        if chart_path:
+            story.append(Paragraph("Data Analysis", styles['Heading2']))
+            img = Image(chart_path, width=400, height=240)
+            story.append(img)
+            story.append(Spacer(1, 12))
+    
+    # Sources
+    story.append(Paragraph("Sources", styles['Heading2']))
+    for source in state.verified_sources:
+        source_para = Paragraph(f"• {source['title']}: {source['url']}", styles['Normal'])
+        story.append(source_para)
+    
+    doc.build(story)
+    return filename
+
+def write_webpage_head(f, state: ContentState) -> None:
+    f.write(f"""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <title>{state.query.title()}</title>
+        <style>
+            body {{ font-family: Arial, sans-serif; margin: 40px; line-height: 1.6; }}
+            h1 {{ color: #333; border-bottom: 2px solid #007acc; }}
+            h2 {{ color: #007acc; }}
+            .section {{ margin-bottom: 30px; }}
+            .sources {{ background: #f5f5f5; padding: 20px; }}
+            img {{ max-width: 100%; height: auto; }}
+        </style>
+    </head>
+    <body>
+        <h1>{state.query.title()}</h1>
+        <p><em>Research-backed content from {len(state.verified_sources)} sources</em></p>
+    """)
+
+def write_webpage_section(f, section: str, content: str) -> None:
+    f.write(f"""
+        <div class="section">
+            <h2>{section}</h2>
+            <p>{content}</p>
+        </div>
+        """)
+
+def write_webpage_tail(f, state: ContentState, filename: str) -> None:
+    # Add chart if available
+    if state.visuals:
+        chart_path = artifacts.resolve_path(state.visuals[0])
+        if chart_path:
+            chart_src = os.path.relpath(chart_path, os.path.dirname(os.path.abspath(filename))).replace(os.sep, '/')
+            f.write(f"""
+            <div class="section">
+                <h2>Data Analysis</h2>
+                <img src="{chart_src}" alt="Analysis Chart">
+            </div>
+            """)
+    
+    # Sources
+    f.write("""
+        <div class="sources">
+            <h2>Sources</h2>
+            <ul>
+    """)
+    for source in state.verified_sources:
+        f.write(f'<li><a href="{source["url"]}">{source["title"]}</a></li>')
+    
+    f.write("""
+            </ul>
+        </div>
+    </body>
+    </html>
+    """)
+
+def create_webpage_file(state: ContentState, output_dir: str) -> str:
+    """Create actual HTML webpage file, writing it section by section"""
+    filename = output_path(state.query, "webpage.html", output_dir)
+    
+    with open(filename, 'w', encoding='utf-8') as f:
+        write_webpage_head(f, state)
+        for section, content in state.generated_content.items():
+            write_webpage_section(f, section, content)
+        write_webpage_tail(f, state, filename)
+    
+    return filename
+
+def finish_streamed_webpage(state: ContentState) -> str:
+    """Append the chart and sources to a webpage whose sections were streamed during generation.
+
+    A no-op if the tail is already there, so a resumed content_assembler can call it again.
+    """
+    with open(state.stream_path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - 64))
+        if f.read().rstrip().endswith(b"</html>"):
+            return state.stream_path
+    with open(state.stream_path, 'a', encoding='utf-8') as f:
+        write_webpage_tail(f, state, state.stream_path)
+    return state.stream_path
+
+class StreamingWebpage:
+    """Writes webpage sections to disk as they are generated.
+
+    Sections may complete in any order; they are written in plan order as soon
+    as every earlier section is available, and each write is flushed so readers
+    see the document grow. Only out-of-order sections are held in memory.
+    """
+
+    def __init__(self, state: ContentState, output_dir: str, sections: List[str]):
+        self.path = output_path(state.query, "webpage.html", output_dir)
+        self.sections = sections
+        self._pending: Dict[str, str] = {}
+        self._next = 0
+        self._file = open(self.path, 'w', encoding='utf-8')
+        write_webpage_head(self._file, state)
+        self._file.flush()
+
+    def add(self, section: str, content: str) -> None:
+        self._pending[section] = content
+        while self._next < len(self.sections) and self.sections[self._next] in self._pending:
+            name = self.sections[self._next]
+            write_webpage_section(self._file, name, self._pending.pop(name))
+            self._next += 1
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+RENDERERS = {
+    "presentation": create_presentation_file,
+    "document": create_document_file,
+    "webpage": create_webpage_file,
+}
+
+# Accept file extensions as well as content types
+FORMAT_ALIASES = {"pptx": "presentation", "pdf": "document", "html": "webpage"}
+
+def normalize_formats(formats: List[str]) -> List[str]:
+    normalized = []
+    for fmt in formats:
+        fmt = FORMAT_ALIASES.get(fmt.lower(), fmt.lower())
+        if fmt not in RENDERERS:
+            raise ValueError(f"Unknown output format: {fmt}")
+        if fmt not in normalized:
+            normalized.append(fmt)
+    return normalized
+
+def _timed_render(fmt: str, state: ContentState, output_dir: str) -> Tuple[str, float]:
+    start = time.perf_counter()
+    filename = RENDERERS[fmt](state, output_dir)
+    return filename, time.perf_counter() - start
+
+def render_formats(state: ContentState, formats: List[str], output_dir: str) -> Tuple[Dict[str, str], Dict[str, float]]:
+    """Render the same content into every requested format in parallel worker processes.
+
+    Returns ({format: filename}, {format: seconds}). All renderers are allowed to
+    finish before the first failure, if any, is re-raised.
+    """
+    futures = {fmt: workers.submit(_timed_render, fmt, state, output_dir) for fmt in formats}
+    files, timings, errors = {}, {}, []
+    for fmt, future in futures.items():
+        try:
+            files[fmt], seconds = future.result()
+            timings[fmt] = round(seconds, 3)
+        except Exception as e:
+            errors.append(e)
+    if errors:
+        raise errors[0]
+    return files, timings
@@ -0,0 +1,118 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+import config
+
+def normalize_query(query: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace so trivial variants share an entry"""
+    return " ".join(re.sub(r"[^\w\s]", " ", query.lower()).split())
+
+class ResearchCache:
+    """SQLite-backed research cache keyed by (provider, normalized query).
+
+    Entries expire after a per-provider TTL, and the table is kept under
+    max_entries / max_bytes by evicting the least recently used rows.
+    """
+
+    def __init__(self, path: str, ttls: Dict[str, int], default_ttl: int, max_entries: int, max_bytes: int):
+        self.path = path
+        self.ttls = ttls
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute('''
+        CREATE TABLE IF NOT EXISTS research_cache (
+            provider TEXT NOT NULL,
+            query_key TEXT NOT NULL,
+            results TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            last_access REAL NOT NULL,
+            PRIMARY KEY (provider, query_key)
+        )
+        ''')
+        self._conn.execute("CREATE INDEX IF NOT EXISTS research_cache_lru ON research_cache (last_access)")
+        self._conn.commit()
+
+    def ttl(self, provider: str) -> int:
+        return self.ttls.get(provider, self.default_ttl)
+
+    def get(self, provider: str, query: str) -> Optional[List[Dict]]:
+        key = normalize_query(query)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT results, created_at FROM research_cache WHERE provider = ? AND query_key = ?",
+                (provider, key)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl(provider):
+                self._conn.execute("DELETE FROM research_cache WHERE provider = ? AND query_key = ?", (provider, key))
+                self._conn.commit()
+                return None
+            self._conn.execute(
+                "UPDATE research_cache SET last_access = ? WHERE provider = ? AND query_key = ?",
+                (now, provider, key)
+            )
+            self._conn.commit()
+        return json.loads(row[0])
+
+    def put(self, provider: str, query: str, results: List[Dict]) -> None:
+        payload = json.dumps(results)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO research_cache VALUES (?, ?, ?, ?, ?, ?)",
+                (provider, normalize_query(query), payload, len(payload), now, now)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM research_cache").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        # Walk from least recently used until both limits are satisfied
+        doomed = []
+        for provider, key, size in self._conn.execute(
+            "SELECT provider, query_key, size FROM research_cache ORDER BY last_access"
+        ):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            doomed.append((provider, key))
+            count -= 1
+            total -= size
+        self._conn.executemany("DELETE FROM research_cache WHERE provider = ? AND query_key = ?", doomed)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM research_cache")
+            self._conn.commit()
+
+_cache: Optional[ResearchCache] = None
+_cache_lock = threading.Lock()
+
+def get_cache() -> Optional[ResearchCache]:
+    """Shared cache instance, or None when caching is disabled"""
+    global _cache
+    if config.RESEARCH_CACHE_MODE == "off":
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResearchCache(
+                config.RESEARCH_CACHE_PATH,
+                ttls=config.RESEARCH_CACHE_TTLS,
+                default_ttl=config.RESEARCH_CACHE_DEFAULT_TTL,
+                max_entries=config.RESEARCH_CACHE_MAX_ENTRIES,
+                max_bytes=config.RESEARCH_CACHE_MAX_BYTES
+            )
+    return _cache
@@ -0,0 +1,155 @@
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional
+from xml.etree import ElementTree as ET
+
+# A provider takes (query, timeout) and returns a list of {'title', 'url', 'snippet'} dicts
+Provider = Callable[[str, float], List[Dict]]
+
+PROVIDERS: Dict[str, Provider] = {}
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session():
+    """Shared keep-alive session so repeated runs reuse pooled connections.
+
+    requests is imported on first use to keep it off the module import path.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            _session = requests.Session()
+            _session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=32))
+            _session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=32))
+    return _session
+
+# Cumulative per-provider timeout counts across runs in this process
+PROVIDER_TIMEOUTS: Counter = Counter()
+_timeouts_lock = threading.Lock()
+
+def register_provider(name: str, provider: Provider) -> None:
+    PROVIDERS[name] = provider
+
+def unregister_provider(name: str) -> None:
+    PROVIDERS.pop(name, None)
+
+def _truncate(text: str, limit: int) -> str:
+    return text[:limit] + '...' if len(text) > limit else text
+
+def search_duckduckgo(query: str, timeout: float) -> List[Dict]:
+    from ddgs import DDGS
+    ddgs = DDGS(timeout=max(1, int(timeout)))
+    web_results = ddgs.text(query, max_results=3)
+    return [{
+        'title': result.get('title', ''),
+        'url': result.get('href', ''),
+        'snippet': _truncate(result.get('body', ''), 200)
+    } for result in web_results]
+
+def search_wikipedia(query: str, timeout: float) -> List[Dict]:
+    import wikipediaapi
+    wiki = wikipediaapi.Wikipedia(
+        user_agent='ContentMaster/1.0 (https://github.com/contentmaster)',
+        language='en',
+        timeout=timeout
+    )
+    search_terms = query.split()[:2]  # Use first 2 words for better Wikipedia results
+    wiki_query = ' '.join(search_terms)
+
+    page = wiki.page(wiki_query)
+    if page.exists():
+        return [{
+            'title': page.title,
+            'url': page.fullurl,
+            'snippet': _truncate(page.summary, 300)
+        }]
+
+    # Try the REST summary endpoint for related pages
+    wiki_search_url = f"https://en.wikipedia.org/api/rest_v1/page/summary/{wiki_query.replace(' ', '_')}"
+    response = get_session().get(wiki_search_url, timeout=timeout)
+    if response.status_code != 200:
+        return []
+    data = response.json()
+    return [{
+        'title': data.get('title', ''),
+        'url': data.get('content_urls', {}).get('desktop', {}).get('page', ''),
+        'snippet': _truncate(data.get('extract', ''), 300)
+    }]
+
+def search_arxiv(query: str, timeout: float) -> List[Dict]:
+    arxiv_url = f"http://export.arxiv.org/api/query?search_query=all:{query}&max_results=2"
+    response = get_session().get(arxiv_url, timeout=timeout)
+    if response.status_code != 200:
+        return []
+    root = ET.fromstring(response.content)
+    namespace = {'atom': 'http://www.w3.org/2005/Atom'}
+
+    results = []
+    for entry in root.findall('atom:entry', namespace)[:2]:
+        title = entry.find('atom:title', namespace)
+        link = entry.find('atom:id', namespace)
+        summary = entry.find('atom:summary', namespace)
+
+        if title is not None and link is not None:
+            results.append({
+                'title': title.text.strip(),
+                'url': link.text.strip(),
+                'snippet': _truncate(summary.text.strip(), 300) if summary is not None else ''
+            })
+    return results
+
+register_provider("duckduckgo", search_duckduckgo)
+register_provider("wikipedia", search_wikipedia)
+register_provider("arxiv", search_arxiv)
+
+def _timed_call(provider: Provider, query: str, timeout: float):
+    start = time.perf_counter()
+    try:
+        return provider(query, timeout), time.perf_counter() - start, None
+    except Exception as e:
+        return [], time.perf_counter() - start, e
+
+def run_providers(query: str, deadline: float, providers: Optional[Dict[str, Provider]] = None):
+    """Query all providers concurrently and keep whatever arrives before the deadline.
+
+    Returns (results_by_provider, stats). Results are keyed in provider registration
+    order so downstream ordering stays deterministic. Providers still running at the
+    deadline are cancelled and their late results discarded; each call is given only
+    the time left before the deadline, so abandoned calls give up soon after it.
+    """
+    providers = PROVIDERS if providers is None else providers
+    results_by_provider: Dict[str, List[Dict]] = {}
+    stats: Dict[str, Dict] = {}
+    if not providers:
+        return results_by_provider, stats
+
+    start = time.perf_counter()
+    executor = ThreadPoolExecutor(max_workers=len(providers), thread_name_prefix="research")
+    futures = {
+        name: executor.submit(_timed_call, provider, query, max(0.0, deadline - (time.perf_counter() - start)))
+        for name, provider in providers.items()
+    }
+    wait(futures.values(), timeout=max(0.0, deadline - (time.perf_counter() - start)))
+    # Don't block on stragglers: queued calls are cancelled, running ones are abandoned
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    for name, future in futures.items():
+        if not future.done():
+            future.cancel()
+            with _timeouts_lock:
+                PROVIDER_TIMEOUTS[name] += 1
+            stats[name] = {'status': 'timeout', 'latency': round(time.perf_counter() - start, 3), 'results': 0}
+            continue
+        results, latency, error = future.result()
+        if error is not None:
+            stats[name] = {'status': 'error', 'latency': round(latency, 3), 'results': 0, 'error': str(error)}
+            continue
+        results_by_provider[name] = results
+        stats[name] = {'status': 'ok', 'latency': round(latency, 3), 'results': len(results)}
+
+    return results_by_provider, stats
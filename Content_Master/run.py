@@ -1,34 +1,94 @@
+import argparse
 import os
+import uuid
 from dotenv import load_dotenv
-from content_master import run_content_master
+from content_master import run_content_master, resume_content_master, get_workflow
+import checkpoints
 import json
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from shared.instrumentation import configure_logging
 
 load_dotenv()
 
-def main():
-    query = input("Enter your content request: ")
-    
+def report(result):
+    print(f"\nResult:")
+    print(f"Type: {result['content_type']}")
+    print(f"Template: {result['template']}")
+    print(f"Quality Score: {result['quality_score']:.2f}")
+    print(f"Sections Generated: {len(result['generated_content'])}")
+    print(f"Visuals Created: {len(result['visuals'])}")
+    print(f"Sources Used: {len(result['verified_sources'])}")
+
+    with open("output.json", "w") as f:
+        json.dump(result['final_output'], f, indent=2, default=str)
+    print("\nFull output saved to output.json")
+
+def run(query, formats=None, output_dir=None):
     if not query.strip():
         query = "Create a presentation on renewable energy trends"
         print(f"Using default query: {query}")
-    
+
+    thread_id = uuid.uuid4().hex
+    try:
+        report(run_content_master(query, formats=formats, output_dir=output_dir, thread_id=thread_id))
+    except Exception as e:
+        print(f"Error: {e}")
+        print(f"Resume with: python run.py resume {thread_id}")
+
+def resume(thread_id):
     try:
-        result = run_content_master(query)
-        
-        print(f"\nResult:")
-        print(f"Type: {result['content_type']}")
-        print(f"Template: {result['template']}")
-        print(f"Quality Score: {result['quality_score']:.2f}")
-        print(f"Sections Generated: {len(result['generated_content'])}")
-        print(f"Visuals Created: {len(result['visuals'])}")
-        print(f"Sources Used: {len(result['verified_sources'])}")
-        
-        with open("output.json", "w") as f:
-            json.dump(result['final_output'], f, indent=2, default=str)
-        print("\nFull output saved to output.json")
-        
+        report(resume_content_master(thread_id))
     except Exception as e:
         print(f"Error: {e}")
 
+def list_runs():
+    runs = checkpoints.list_runs(get_workflow())
+    if not runs:
+        print("No checkpointed runs")
+    for run in runs:
+        status = "completed" if run['completed'] else f"next: {', '.join(run['next']) or '-'}"
+        print(f"{run['thread_id']}  {run['updated_at'][:19]}  {status}  {run['query']}")
+
+def prune(thread_ids, older_than, completed):
+    if not (thread_ids or older_than is not None or completed):
+        print("Refusing to prune everything; pass thread ids, --older-than or --completed")
+        return
+    deleted = checkpoints.prune(get_workflow(), thread_ids, older_than, completed)
+    print(f"Deleted checkpoints for {len(deleted)} runs")
+
+def main():
+    parser = argparse.ArgumentParser(description="ContentMaster runner")
+    commands = parser.add_subparsers(dest="command")
+
+    run_parser = commands.add_parser("run", help="generate content for a query")
+    run_parser.add_argument("query")
+    run_parser.add_argument("--formats", nargs="+", help="any of pptx/pdf/html (default: analyzed content type)")
+    run_parser.add_argument("--output-dir")
+
+    commands.add_parser("list", help="list checkpointed runs")
+
+    resume_parser = commands.add_parser("resume", help="resume a failed or interrupted run")
+    resume_parser.add_argument("thread_id")
+
+    prune_parser = commands.add_parser("prune", help="delete checkpoints")
+    prune_parser.add_argument("thread_ids", nargs="*")
+    prune_parser.add_argument("--older-than", type=float, metavar="DAYS")
+    prune_parser.add_argument("--completed", action="store_true", help="only runs that finished")
+
+    args = parser.parse_args()
+    configure_logging()
+    if args.command == "run":
+        run(args.query, args.formats, args.output_dir)
+    elif args.command == "list":
+        list_runs()
+    elif args.command == "resume":
+        resume(args.thread_id)
+    elif args.command == "prune":
+        prune(args.thread_ids, args.older_than, args.completed)
+    else:
+        run(input("Enter your content request: "))
+
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
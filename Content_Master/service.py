@@ -0,0 +1,52 @@
+import argparse
+import os
+import sys
+import time
+from content_master import METRICS, get_workflow, run_content_master
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from shared.http_service import make_server
+from shared.instrumentation import configure_logging
+
+class ContentMasterService:
+    """Resident ContentMaster: the workflow is compiled once and the LLM client,
+    HTTP session and research cache stay warm between requests."""
+
+    def __init__(self):
+        self.app = get_workflow()
+
+    def run(self, query: str, formats: list = None, output_dir: str = None) -> dict:
+        if not query or not query.strip():
+            raise ValueError("query is required")
+        start = time.perf_counter()
+        result = run_content_master(query, formats=formats, output_dir=output_dir)
+        return {
+            **result['final_output'],
+            'research_stats': result['research_stats'],
+            'elapsed': round(time.perf_counter() - start, 3)
+        }
+
+    def serve(self, host: str = "127.0.0.1", port: int = 8001, max_concurrency: int = 4):
+        server = make_server(host, port,
+                             {"/run": lambda payload: self.run(payload["query"], payload.get("formats"), payload.get("output_dir"))},
+                             {"/metrics": METRICS.prometheus, "/metrics.json": METRICS.report},
+                             max_concurrency=max_concurrency)
+        print(f"ContentMaster service listening on http://{host}:{port} (POST /run, GET /metrics)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Run ContentMaster as a long-running HTTP service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--max-concurrency", type=int, default=4)
+    args = parser.parse_args()
+    configure_logging()
+    ContentMasterService().serve(args.host, args.port, args.max_concurrency)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import csv
+import os
+from functools import lru_cache
+from typing import Dict, List
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from text_similarity import near_duplicate_groups
+
+DEFAULT_CREDIBILITY = 0.6
+CREDIBILITY_TABLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "domain_credibility.csv")
+
+TRACKING_PARAMS = {"fbclid", "gclid", "msclkid", "ref", "ref_src", "igshid", "mc_cid", "mc_eid"}
+
+def canonicalize_url(url: str) -> str:
+    """Normalize a URL so trivially different links to the same page compare equal.
+
+    Anything without a host is returned stripped but otherwise unchanged.
+    """
+    parts = urlsplit(url.strip())
+    if not parts.netloc:
+        return url.strip()
+    scheme = parts.scheme.lower() or "https"
+    if scheme == "http":
+        scheme = "https"
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+    if host.endswith("wikipedia.org"):
+        host = host.replace(".m.wikipedia.org", ".wikipedia.org")
+    path = parts.path.rstrip("/") or "/"
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    ))
+    return urlunsplit((scheme, host, path, query, ""))
+
+@lru_cache(maxsize=1)
+def credibility_index() -> Dict[str, float]:
+    with open(CREDIBILITY_TABLE, newline="", encoding="utf-8") as f:
+        return {row["domain"].strip().lower(): float(row["score"]) for row in csv.DictReader(f)}
+
+def domain_credibility(url: str) -> float:
+    """Score of the most specific domain suffix in the credibility table"""
+    host = (urlsplit(url).hostname or "").lower()
+    index = credibility_index()
+    labels = host.split(".")
+    for i in range(len(labels)):
+        score = index.get(".".join(labels[i:]))
+        if score is not None:
+            return score
+    return DEFAULT_CREDIBILITY
+
+def verify_sources(results: List[Dict], duplicate_threshold: float = 0.7) -> List[Dict]:
+    """Score and deduplicate search results, best first.
+
+    Exact duplicates (same canonical URL) and near-duplicate snippets are
+    collapsed to their most credible member. The canonical URL is only the
+    dedup key; each source keeps the URL it was found under. Results without
+    a host in their URL are never merged on it.
+    """
+    best_by_url: Dict[str, Dict] = {}
+    for position, result in enumerate(results):
+        url = result.get('url') or ''
+        key = canonicalize_url(url) if urlsplit(url.strip()).netloc else f"#{position}"
+        scored = {**result, 'credibility_score': domain_credibility(url.strip())}
+        current = best_by_url.get(key)
+        if current is None or scored['credibility_score'] > current['credibility_score']:
+            best_by_url[key] = scored
+
+    unique = list(best_by_url.values())
+    groups = near_duplicate_groups([f"{s.get('title', '')} {s.get('snippet', '')}" for s in unique], duplicate_threshold)
+    best_by_group: Dict[int, Dict] = {}
+    for group, source in zip(groups, unique):
+        current = best_by_group.get(group)
+        if current is None or source['credibility_score'] > current['credibility_score']:
+            best_by_group[group] = source
+
+    return sorted(best_by_group.values(), key=lambda s: s['credibility_score'], reverse=True)
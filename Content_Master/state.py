@@ -4,10 +4,16 @@ from pydantic import BaseModel
 class ContentState(BaseModel):
     query: str = ""
     content_type: str = ""
+    output_formats: List[str] = []
+    output_dir: str = ""
+    stream: bool = False
+    stream_path: str = ""
     search_results: List[Dict] = []
+    research_stats: Dict = {}
     verified_sources: List[Dict] = []
     content_plan: Dict = {}
     generated_content: Dict = {}
+    prompt_stats: Dict = {}
     visuals: List[Dict] = []
     template: str = ""
     final_output: Dict = {}
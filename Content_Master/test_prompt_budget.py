@@ -0,0 +1,27 @@
+import config
+import prompt_budget
+
+SNIPPET = ("Solar and wind capacity grew faster than any other source last year, driven by falling module "
+           "prices, new offshore projects and grid-scale storage that smooths out intermittent supply.")
+
+def make_sources(count):
+    return [{'title': f"Renewable energy report {i}", 'url': f"https://example{i}.org/report",
+             'snippet': f"{SNIPPET} Finding {i}: {' '.join(['capacity'] * i)}", 'credibility_score': 0.9 - i * 0.05}
+            for i in range(count)]
+
+def test_default_budget_never_adds_source_tokens():
+    sections = ['Title', 'Introduction', 'Main Points', 'Data/Statistics', 'Conclusion']
+    for count in (1, 3, 8):
+        blocks, stats = prompt_budget.section_source_blocks(
+            make_sources(count), "Create a presentation on renewable energy trends", sections,
+            config.PROMPT_SOURCE_TOKEN_BUDGET, config.PROMPT_MAX_SOURCES
+        )
+        assert stats['tokens_saved'] >= 0
+        for _, tokens in blocks.values():
+            assert tokens <= stats['untrimmed_source_tokens'] // len(sections)
+
+def test_small_budget_trims_the_last_line():
+    text, tokens = prompt_budget.assemble_sources(make_sources(3), "renewable energy", "Introduction",
+                                                  budget=40, max_sources=5)
+    assert tokens <= 40
+    assert text.endswith("...")
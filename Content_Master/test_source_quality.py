@@ -0,0 +1,25 @@
+from source_quality import canonicalize_url, verify_sources
+
+def test_canonicalize_url():
+    assert canonicalize_url("http://www.Example.com/a/?utm_source=x&b=2&a=1#top") == "https://example.com/a?a=1&b=2"
+    assert canonicalize_url("https://en.m.wikipedia.org/wiki/Solar_power") == "https://en.wikipedia.org/wiki/Solar_power"
+    assert canonicalize_url("https://example.com:8080") == "https://example.com:8080/"
+    assert canonicalize_url("") == ""
+    assert canonicalize_url("  not a url ") == "not a url"
+
+def test_verify_sources_dedups_on_canonical_url_and_keeps_the_original():
+    results = [
+        {'title': "Solar report", 'url': "http://www.example.com/solar/?utm_source=feed", 'snippet': "Solar capacity doubled"},
+        {'title': "Solar report (mirror)", 'url': "https://example.com/solar", 'snippet': "Solar capacity doubled again"},
+    ]
+    sources = verify_sources(results)
+    assert len(sources) == 1
+    assert sources[0]['url'] == "http://www.example.com/solar/?utm_source=feed"
+
+def test_verify_sources_keeps_results_without_a_host():
+    results = [
+        {'title': "Wind turbines", 'url': "", 'snippet': "Offshore wind farms are getting larger"},
+        {'title': "Battery storage", 'snippet': "Grid batteries smooth out supply"},
+        {'title': "Heat pumps", 'url': "/relative/path", 'snippet': "Heat pumps replace gas boilers"},
+    ]
+    assert {s['title'] for s in verify_sources(results)} == {"Wind turbines", "Battery storage", "Heat pumps"}
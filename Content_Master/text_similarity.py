@@ -0,0 +1,74 @@
+import hashlib
+import re
+from collections import defaultdict
+from typing import Dict, List, Set, Tuple
+
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+def words(text: str):
+    return WORD_RE.findall(text.lower())
+
+def shingles(text: str, k: int = 3) -> Set[str]:
+    """Word k-shingles; texts shorter than k words yield a single shingle"""
+    tokens = words(text)
+    if len(tokens) <= k:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i:i + k]) for i in range(len(tokens) - k + 1)}
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+# MinHash over shingles: permutations are simulated with random affine maps modulo a Mersenne prime
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+def _permutations(num_perm: int, seed: int = 1):
+    import random
+    rng = random.Random(seed)
+    return [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+
+_PERMUTATIONS = _permutations(64)
+
+def minhash(shingle_set: Set[str], num_perm: int = 64) -> Tuple[int, ...]:
+    if not shingle_set:
+        return tuple([_MAX_HASH] * num_perm)
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little") for s in shingle_set]
+    return tuple(min(((a * h + b) % _PRIME) & _MAX_HASH for h in hashes) for a, b in _PERMUTATIONS[:num_perm])
+
+def estimated_jaccard(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+def near_duplicate_groups(texts: List[str], threshold: float = 0.7, bands: int = 16, rows: int = 4) -> List[int]:
+    """Cluster near-duplicate texts with MinHash + LSH banding.
+
+    Returns a group id per text (the index of the group's first member). Only
+    texts sharing an LSH band bucket are compared, so the cost stays roughly
+    linear in the number of texts.
+    """
+    parent = list(range(len(texts)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    signatures = [minhash(shingles(text), bands * rows) for text in texts]
+    buckets: Dict[Tuple, List[int]] = defaultdict(list)
+    for i, signature in enumerate(signatures):
+        if not texts[i].strip():
+            continue
+        for band in range(bands):
+            key = (band, signature[band * rows:(band + 1) * rows])
+            merged = False
+            for j in buckets[key]:
+                if estimated_jaccard(signatures[i], signatures[j]) >= threshold:
+                    root_i, root_j = find(i), find(j)
+                    parent[max(root_i, root_j)] = min(root_i, root_j)
+                    merged = True
+            # Texts that joined an existing member stay out of the bucket so duplicates don't grow it
+            if not merged:
+                buckets[key].append(i)
+    return [find(i) for i in range(len(texts))]
@@ -0,0 +1,36 @@
+import atexit
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+import config
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_process_pool():
+    """Shared worker pool for CPU-bound rendering, or None when RENDER_WORKERS is 0.
+
+    Workers are spawned rather than forked because the graph runs nodes on
+    threads, and forking a threaded process is unsafe.
+    """
+    global _pool
+    if config.RENDER_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=config.RENDER_WORKERS,
+                                        mp_context=multiprocessing.get_context("spawn"))
+            atexit.register(_pool.shutdown)
+    return _pool
+
+def submit(fn, *args) -> Future:
+    """Run fn in the process pool, or inline when the pool is disabled"""
+    pool = get_process_pool()
+    if pool is not None:
+        return pool.submit(fn, *args)
+    future = Future()
+    try:
+        future.set_result(fn(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
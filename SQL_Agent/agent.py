@@ -1,10 +1,24 @@
 from langgraph.graph import StateGraph, END
 from langchain_openai import ChatOpenAI
 from typing import TypedDict
-from database import setup_database, execute_query
+from database import setup_database, execute_query, check_query
+import cost_guard
+import database
+import schema_catalog
+import plan_cache
+import index_advisor
+import json
 import os
+import sys
+import logging
+import threading
+import time
 from dotenv import load_dotenv
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from shared.instrumentation import MetricsRegistry, token_usage_handler
+from shared.llm_client import LLMClient
+
 load_dotenv()
 def get_openai_key():
     api_key = os.getenv("OPENAI_API_KEY")
@@ -16,65 +30,151 @@ def get_openai_key():
     return api_key
 
 os.environ["OPENAI_API_KEY"] = get_openai_key()
-llm = ChatOpenAI(model="gpt-4", temperature=0)
+logger = logging.getLogger("sql_agent")
+METRICS = MetricsRegistry("sql_agent")
+llm = LLMClient.from_env(
+    ChatOpenAI(model="gpt-4", temperature=0, max_retries=0, callbacks=[token_usage_handler(METRICS)]),
+    metrics=METRICS,
+    cache_path=os.path.join(os.path.dirname(os.path.abspath(__file__)), "llm_cache.sqlite")
+)
+
+MAX_ATTEMPTS = int(os.getenv("SQL_AGENT_MAX_ATTEMPTS", "3"))
+PLAN_CACHE = plan_cache.PlanCache(schema_catalog.get_catalog(), database.get_data_monitor().current, metrics=METRICS) if plan_cache.ENABLED else None
+ADVISOR = index_advisor.IndexAdvisor(metrics=METRICS)
 
 class State(TypedDict):
     question: str
     sql: str
     results: list
+    columns: list
+    row_count: int
+    truncated: bool
+    summary: dict
+    plan_cached: bool
+    attempts: int
     response: str
     error: str
 
 def parse_query(state):
-    prompt = f"Convert this question to SQL for students table (columns: name, subject, grade): {state['question']}"
+    if PLAN_CACHE is not None:
+        if state.get("error"):
+            # Retrying: never reuse a plan, and drop one that just failed
+            if state.get("plan_cached"):
+                PLAN_CACHE.invalidate(state['question'])
+        else:
+            sql = PLAN_CACHE.lookup(state['question'])
+            if sql is not None:
+                return {"sql": sql, "plan_cached": True, "attempts": state.get("attempts", 0) + 1}
+
+    schema = schema_catalog.get_catalog().describe(state['question'])
+    prompt = f"Convert this question to a SQLite SELECT query. Return only the SQL.\nTables:\n{schema}\nQuestion: {state['question']}"
+    if state.get("error"):
+        prompt += f"\nThe previous query was not run. Reason: {state['error']}\nPrevious query: {state.get('sql', '')}"
+    start = time.perf_counter()
     sql = llm.invoke(prompt).content.strip()
-    return {"sql": sql}
+    if PLAN_CACHE is not None:
+        PLAN_CACHE.record_llm_latency(time.perf_counter() - start)
+    return {"sql": sql, "plan_cached": False, "attempts": state.get("attempts", 0) + 1}
 
 def validate_sql(state):
     sql = state["sql"]
     if not sql.upper().startswith("SELECT"):
         return {"error": "Only SELECT queries allowed"}
+    try:
+        reason = check_query(sql)
+        if reason:
+            # Rejected scans are exactly the patterns an index would fix
+            ADVISOR.record(sql)
+    except Exception as e:
+        reason = f"{cost_guard.REJECTED}: {e}"
+    if reason:
+        METRICS.inc("queries_rejected_total", {'stage': "plan"})
+        return {"error": reason}
     return {"error": ""}
 
 def execute_query_node(state):
-    results, error = execute_query(state["sql"])
+    result, error = execute_query(state["sql"])
     if error:
+        if error.startswith(cost_guard.INTERRUPTED):
+            METRICS.inc("queries_rejected_total", {'stage': "execute"})
+        if PLAN_CACHE is not None and state.get("plan_cached"):
+            PLAN_CACHE.invalidate(state["question"])
         return {"error": error}
-    return {"results": results, "error": ""}
+    if PLAN_CACHE is not None and not state.get("plan_cached"):
+        PLAN_CACHE.store(state["question"], state["sql"])
+    METRICS.inc("queries_total", {'cached': str(result.get("cached", False)).lower()})
+    if not result.get("cached"):
+        ADVISOR.record(state["sql"])
+    METRICS.observe("result_rows", result["row_count"], buckets=(1, 10, 100, 1000, 10000, 100000, 1000000))
+    return {
+        "results": result["rows"],
+        "columns": result["columns"],
+        "row_count": result["row_count"],
+        "truncated": result["truncated"],
+        "summary": result["summary"],
+        "error": ""
+    }
 
 def generate_response(state):
     if state.get("error"):
         return {"response": f"Error: {state['error']}"}
     
-    prompt = f"Convert this SQL result to natural language. Question: {state['question']}, Results: {state['results']}"
+    if state.get("truncated"):
+        # Large results are described by their local summary instead of being pasted into the prompt
+        prompt = (f"Convert this SQL result to natural language. Question: {state['question']}, "
+                  f"The query returned {state['row_count']} rows with columns {state['columns']}. "
+                  f"Summary: {json.dumps(state['summary'], default=str)}")
+    else:
+        prompt = f"Convert this SQL result to natural language. Question: {state['question']}, Columns: {state.get('columns')}, Results: {state['results']}"
     response = llm.invoke(prompt).content
     return {"response": response}
 
 def should_retry(state):
-    return "parse" if state.get("error") and "Only SELECT" in state["error"] else "execute"
+    """Rejected queries go back to parse with the reason until the attempts run out"""
+    if not state.get("error"):
+        return "execute"
+    return "parse" if state.get("attempts", 0) < MAX_ATTEMPTS else "respond"
 
 def should_respond(state):
+    error = state.get("error") or ""
+    if error.startswith(cost_guard.INTERRUPTED) and state.get("attempts", 0) < MAX_ATTEMPTS:
+        return "parse"
     return "respond"
 
 def create_graph():
     workflow = StateGraph(State)
     
-    workflow.add_node("parse", parse_query)
-    workflow.add_node("validate", validate_sql)
-    workflow.add_node("execute", execute_query_node)
-    workflow.add_node("respond", generate_response)
+    nodes = {
+        "parse": parse_query,
+        "validate": validate_sql,
+        "execute": execute_query_node,
+        "respond": generate_response,
+    }
+    for name, node in nodes.items():
+        workflow.add_node(name, METRICS.instrument(name, node, logger))
     
     workflow.set_entry_point("parse")
     workflow.add_edge("parse", "validate")
-    workflow.add_conditional_edges("validate", should_retry, {"parse": "parse", "execute": "execute"})
-    workflow.add_conditional_edges("execute", should_respond, {"respond": "respond"})
+    workflow.add_conditional_edges("validate", should_retry, {"parse": "parse", "execute": "execute", "respond": "respond"})
+    workflow.add_conditional_edges("execute", should_respond, {"parse": "parse", "respond": "respond"})
     workflow.add_edge("respond", END)
     
     return workflow.compile()
 
+_graph = None
+_graph_lock = threading.Lock()
+
+def get_graph():
+    """Set up the database and compile the graph once per process"""
+    global _graph
+    with _graph_lock:
+        if _graph is None:
+            setup_database()
+            _graph = create_graph()
+    return _graph
+
 def run_agent(question):
-    setup_database()
-    graph = create_graph()
+    graph = get_graph()
     result = graph.invoke({"question": question})
     return result["response"]
 
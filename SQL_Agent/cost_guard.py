@@ -0,0 +1,136 @@
+import os
+import re
+import sqlite3
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+# Largest number of rows a plan may visit by full scans (multiplied across nested join loops)
+MAX_SCAN_ROWS = int(os.getenv("SQL_AGENT_MAX_SCAN_ROWS", "1000000"))
+# Execution budget enforced by the progress handler; 0 disables a limit
+QUERY_TIMEOUT = float(os.getenv("SQL_AGENT_QUERY_TIMEOUT", "5"))
+MAX_VM_STEPS = int(os.getenv("SQL_AGENT_MAX_VM_STEPS", "0"))
+PROGRESS_INTERVAL = 1000
+
+REJECTED = "Query rejected"
+INTERRUPTED = "Query interrupted"
+
+# SQLite before 3.36 reports "SCAN TABLE x"
+SCAN = re.compile(r"^SCAN (?:TABLE )?(\S+)")
+LIMIT_CLAUSE = re.compile(r"\blimit\s+(\d+)(?:\s*(?:,|\boffset\b)\s*(\d+))?$", re.IGNORECASE)
+# Anything that needs every row before the first one is returned
+FULL_RESULT = re.compile(r"\b(?:order\s+by|group\s+by|distinct|union|except|intersect|over)\b"
+                         r"|\b(?:count|sum|avg|min|max|group_concat|total)\s*\(", re.IGNORECASE)
+TABLE_REF = re.compile(r"(?:\bfrom|\bjoin|,)\s+\"?(\w+)\"?(?:\s+(?:as\s+)?(\w+))?", re.IGNORECASE)
+KEYWORDS = {"where", "on", "join", "inner", "left", "right", "full", "cross", "natural", "group", "order",
+            "limit", "having", "union", "except", "intersect", "using", "window", "outer", "as"}
+
+class QueryInterrupted(Exception):
+    pass
+
+def explain(conn: sqlite3.Connection, sql: str) -> List[tuple]:
+    """EXPLAIN QUERY PLAN rows as (id, parent, detail)"""
+    # A cached EXPLAIN statement is not re-prepared after another connection changes the schema
+    # (e.g. adds an index), so reload the schema with a read and tag the text with its version
+    conn.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchall()
+    version = conn.execute("PRAGMA schema_version").fetchone()[0]
+    return [(row[0], row[1], row[3]) for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}\n-- schema {version}")]
+
+def aliases(sql: str, tables: Dict[str, int]) -> Dict[str, str]:
+    """Map aliases used in the query (and the table names themselves) to table names"""
+    names = {name.lower(): name for name in tables}
+    mapping = {}
+    for table, alias in TABLE_REF.findall(sql):
+        table = names.get(table.lower())
+        if table is None:
+            continue
+        mapping[table.lower()] = table
+        if alias and alias.lower() not in KEYWORDS:
+            mapping[alias.lower()] = table
+    return mapping
+
+def row_limit(sql: str) -> Optional[int]:
+    """Rows the statement can visit before its LIMIT (plus OFFSET) stops it, or None if it must read everything"""
+    match = LIMIT_CLAUSE.search(sql)
+    if not match or FULL_RESULT.search(sql):
+        return None
+    return int(match.group(1)) + int(match.group(2) or 0)
+
+def estimate_rows(conn: sqlite3.Connection, table: str) -> Optional[int]:
+    """Row estimate from ANALYZE statistics or the largest rowid; both avoid scanning"""
+    try:
+        row = conn.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = ? AND idx IS NULL", (table,)).fetchone() \
+            or conn.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = ?", (table,)).fetchone()
+        if row:
+            return int(row[0].split()[0])
+    except sqlite3.OperationalError:
+        pass  # no sqlite_stat1 until ANALYZE has run
+    try:
+        quoted = table.replace('"', '""')
+        return conn.execute(f'SELECT MAX(rowid) FROM "{quoted}"').fetchone()[0] or 0
+    except sqlite3.OperationalError:
+        return None  # WITHOUT ROWID table without statistics
+
+def check_plan(conn: sqlite3.Connection, sql: str, max_scan_rows: int = MAX_SCAN_ROWS) -> Optional[str]:
+    """Reason to reject the query, or None if its plan is within budget.
+
+    Full scans under the same plan node run as nested loops, so their row
+    estimates multiply; a cross join of two medium tables is caught as
+    readily as one scan of a huge table. A LIMIT without ordering, grouping
+    or aggregation caps the estimate, since SQLite stops once it has enough
+    rows; filtered scans that run long are left to the execution budget.
+    """
+    plan = explain(conn, sql)
+    tables = {name: 0 for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    names = aliases(sql, tables)
+    limit = row_limit(sql)
+    loops = defaultdict(list)
+    for _, parent, detail in plan:
+        match = SCAN.match(detail)
+        if not match or match.group(1) == "CONSTANT":
+            continue
+        table = names.get(match.group(1).lower()) or (match.group(1) if match.group(1) in tables else None)
+        rows = estimate_rows(conn, table) if table else None
+        if rows:
+            loops[parent].append((table, rows))
+
+    for scans in loops.values():
+        visited = 1
+        for _, rows in scans:
+            visited *= rows
+        if limit is not None:
+            visited = min(visited, limit)
+        if visited > max_scan_rows:
+            described = " x ".join(f"{table} (~{rows} rows)" for table, rows in scans)
+            hint = "avoid the cross join and join on keys" if len(scans) > 1 else "filter on an indexed column"
+            return f"{REJECTED}: full scan of {described} exceeds the {max_scan_rows}-row budget; {hint}"
+    return None
+
+@contextmanager
+def execution_budget(conn: sqlite3.Connection, timeout: float = QUERY_TIMEOUT, max_steps: int = MAX_VM_STEPS):
+    """Interrupt statements on this connection that run past the wall-clock or VM-step budget"""
+    if not timeout and not max_steps:
+        yield
+        return
+    deadline = time.monotonic() + timeout if timeout else None
+    state = {'steps': 0, 'reason': None}
+
+    def progress():
+        state['steps'] += PROGRESS_INTERVAL
+        if deadline is not None and time.monotonic() > deadline:
+            state['reason'] = f"exceeded the {timeout:g}s time budget"
+        elif max_steps and state['steps'] > max_steps:
+            state['reason'] = f"exceeded the {max_steps} VM-step budget"
+        return 1 if state['reason'] else 0
+
+    conn.set_progress_handler(progress, PROGRESS_INTERVAL)
+    try:
+        yield
+    except sqlite3.OperationalError as e:
+        if state['reason']:
+            raise QueryInterrupted(f"{INTERRUPTED}: {state['reason']}; write a more selective query") from e
+        raise
+    finally:
+        # Pooled connections are shared, so never leave a handler behind
+        conn.set_progress_handler(None, 0)
@@ -1,40 +1,485 @@
+import argparse
+import csv
+import json
+import os
+import queue
+import re
 import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import quote
 
-def setup_database():
-    conn = sqlite3.connect('students.db')
-    cursor = conn.cursor()
-    
-    cursor.execute('''
+import cost_guard
+from result_summary import ResultSummary
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from shared.llm_client import estimate_tokens
+
+DB_PATH = os.path.abspath(os.getenv(
+    "SQL_AGENT_DB_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "students.db")
+))
+POOL_SIZE = int(os.getenv("SQL_AGENT_POOL_SIZE", "8"))
+# Page cache per connection in KiB (negative cache_size) and memory-mapped I/O window in bytes
+CACHE_SIZE_KB = int(os.getenv("SQL_AGENT_CACHE_SIZE_KB", "16384"))
+MMAP_SIZE = int(os.getenv("SQL_AGENT_MMAP_SIZE", str(256 * 1024 * 1024)))
+BUSY_TIMEOUT = float(os.getenv("SQL_AGENT_BUSY_TIMEOUT", "5"))
+
+# Result streaming: rows kept for the response, their estimated prompt tokens, and the most rows read at all.
+# Kept rows are pasted into the gpt-4 prompt (8k context), so larger results are summarized instead
+MAX_ROWS = int(os.getenv("SQL_AGENT_MAX_ROWS", "200"))
+MAX_RESULT_TOKENS = int(os.getenv("SQL_AGENT_MAX_RESULT_TOKENS", "2000"))
+SCAN_LIMIT = int(os.getenv("SQL_AGENT_SCAN_LIMIT", "100000"))
+FETCH_SIZE = int(os.getenv("SQL_AGENT_FETCH_SIZE", "500"))
+SUMMARY_TOP_K = int(os.getenv("SQL_AGENT_SUMMARY_TOP_K", "10"))
+
+# Query result cache, invalidated whenever any connection commits to the database
+RESULT_CACHE_ENABLED = os.getenv("SQL_AGENT_RESULT_CACHE", "on").lower() not in ("0", "off", "false")
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("SQL_AGENT_RESULT_CACHE_MAX_ENTRIES", "256"))
+RESULT_CACHE_MAX_BYTES = int(os.getenv("SQL_AGENT_RESULT_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+class ConnectionPool:
+    """Thread-safe pool of read-only connections to one database file.
+
+    Connections are opened lazily up to `size`; callers beyond that wait for
+    one to be returned. The database is expected to be in WAL mode so readers
+    never block on the writer.
+    """
+
+    def __init__(self, path: str, size: int = POOL_SIZE):
+        self.path = path
+        self.size = size
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._opened = 0
+        self._closed = False
+
+    def _open(self) -> sqlite3.Connection:
+        return open_readonly(self.path)
+
+    def acquire(self, timeout: Optional[float] = None) -> sqlite3.Connection:
+        if self._closed:
+            raise sqlite3.ProgrammingError("Cannot acquire a connection from a closed pool")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            opened = self._opened < self.size
+            if opened:
+                self._opened += 1
+        if opened:
+            try:
+                return self._open()
+            except Exception:
+                with self._lock:
+                    self._opened -= 1
+                raise
+        return self._idle.get(timeout=timeout)
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        if conn.in_transaction:
+            conn.rollback()
+        if self._closed:
+            conn.close()
+            with self._lock:
+                self._opened -= 1
+            return
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self) -> None:
+        """Close idle connections; connections currently checked out are closed on return"""
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._opened -= 1
+
+def open_readonly(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(f"file:{quote(path)}?mode=ro", uri=True,
+                           check_same_thread=False, timeout=BUSY_TIMEOUT)
+    conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KB}")
+    conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+    return conn
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(DB_PATH)
+    return _pool
+
+SEED_STUDENTS = [
+    ('Alice', 'Math', 85),
+    ('Alice', 'Science', 78),
+    ('Bob', 'Math', 92),
+    ('Bob', 'Science', 88),
+    ('Charlie', 'Math', 76),
+    ('Charlie', 'Science', 82)
+]
+
+def _create_students(conn):
+    conn.execute('''
     CREATE TABLE IF NOT EXISTS students (
         name TEXT,
         subject TEXT,
         grade INTEGER
     )
     ''')
-    
-    cursor.execute('DELETE FROM students')
-    
-    students_data = [
-        ('Alice', 'Math', 85),
-        ('Alice', 'Science', 78),
-        ('Bob', 'Math', 92),
-        ('Bob', 'Science', 88),
-        ('Charlie', 'Math', 76),
-        ('Charlie', 'Science', 82)
-    ]
-    
-    cursor.executemany('INSERT INTO students VALUES (?, ?, ?)', students_data)
-    conn.commit()
-    conn.close()
-
-def execute_query(sql):
-    conn = sqlite3.connect('students.db')
-    cursor = conn.cursor()
+    # Databases created before versioning already hold the seed rows
+    if conn.execute("SELECT 1 FROM students LIMIT 1").fetchone() is None:
+        conn.executemany('INSERT INTO students VALUES (?, ?, ?)', SEED_STUDENTS)
+
+# Applied in order; PRAGMA user_version records how many have run
+MIGRATIONS = [
+    _create_students,
+]
+
+def schema_version(conn) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def setup_database(path: str = None) -> int:
+    """Apply pending migrations and return the schema version.
+
+    Idempotent: when the file is already current this only reads the version,
+    so it never takes the write lock on a migrated database.
+    """
+    conn = sqlite3.connect(path or DB_PATH, timeout=BUSY_TIMEOUT, isolation_level=None)
     try:
-        cursor.execute(sql)
-        results = cursor.fetchall()
+        # WAL is persistent in the file; it lets the pooled readers run alongside a writer
+        if conn.execute("PRAGMA journal_mode").fetchone()[0] != "wal":
+            conn.execute("PRAGMA journal_mode=WAL")
+        if schema_version(conn) >= len(MIGRATIONS):
+            return schema_version(conn)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Re-read under the write lock in case another process migrated first
+            version = schema_version(conn)
+            for migration in MIGRATIONS[version:]:
+                migration(conn)
+            conn.execute(f"PRAGMA user_version = {len(MIGRATIONS)}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return len(MIGRATIONS)
+    finally:
         conn.close()
-        return results, None
-    except Exception as e:
+
+def read_records(path: str, fmt: str = None) -> Iterator[Dict]:
+    """Rows from a CSV file (with header) or a JSONL file, one dict at a time"""
+    fmt = fmt or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+    with open(path, newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+def _sql_type(value) -> str:
+    if isinstance(value, bool) or isinstance(value, int):
+        return "INTEGER"
+    if isinstance(value, float):
+        return "REAL"
+    text = str(value).strip()
+    for cast, name in ((int, "INTEGER"), (float, "REAL")):
+        try:
+            cast(text)
+            return name
+        except ValueError:
+            pass
+    return "TEXT"
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+def bulk_load(table: str, path: str, fmt: str = None, batch_size: int = 50000, db_path: str = None) -> int:
+    """Append a CSV/JSONL file to `table` in batched transactions and return the row count.
+
+    The table is created from the first record if missing. Its indexes are
+    dropped for the load and rebuilt once at the end, which is much faster
+    than maintaining them row by row.
+    """
+    records = read_records(path, fmt)
+    first = next(records, None)
+    if first is None:
+        return 0
+    columns = list(first)
+
+    conn = sqlite3.connect(db_path or DB_PATH, timeout=BUSY_TIMEOUT, isolation_level=None)
+    try:
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KB * 4}")
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {_quote(table)} "
+                     f"({', '.join(f'{_quote(c)} {_sql_type(first[c])}' for c in columns)})")
+        indexes = conn.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL", (table,)
+        ).fetchall()
+        for name, _ in indexes:
+            conn.execute(f"DROP INDEX {_quote(name)}")
+
+        insert = (f"INSERT INTO {_quote(table)} ({', '.join(map(_quote, columns))}) "
+                  f"VALUES ({', '.join('?' * len(columns))})")
+        loaded = 0
+        try:
+            batch = [first]
+            for record in records:
+                batch.append(record)
+                if len(batch) >= batch_size:
+                    loaded += _insert_batch(conn, insert, columns, batch)
+                    batch = []
+            loaded += _insert_batch(conn, insert, columns, batch)
+        finally:
+            # Rebuild even after a failed batch so the table is never left unindexed
+            for _, sql in indexes:
+                conn.execute(sql)
+            conn.execute("ANALYZE " + _quote(table))
+        return loaded
+    finally:
         conn.close()
-        return None, str(e) 
\ No newline at end of file
+
+def _insert_batch(conn, insert: str, columns: List[str], batch: List[Dict]) -> int:
+    if not batch:
+        return 0
+    conn.execute("BEGIN")
+    try:
+        conn.executemany(insert, ([record.get(c) for c in columns] for record in batch))
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return len(batch)
+
+LIMIT_CLAUSE = cost_guard.LIMIT_CLAUSE
+
+def strip_sql(sql: str) -> str:
+    return sql.strip().rstrip(";").strip()
+
+def with_limit(sql: str, limit: int) -> str:
+    """Append LIMIT to a query that has none at the end, so SQLite can stop early"""
+    sql = strip_sql(sql)
+    return sql if LIMIT_CLAUSE.search(sql) else f"{sql} LIMIT {limit}"
+
+def stream_rows(cursor, fetch_size: int = FETCH_SIZE) -> Iterator[tuple]:
+    while True:
+        rows = cursor.fetchmany(fetch_size)
+        if not rows:
+            return
+        yield from rows
+
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace outside string literals so formatting variants share a cache entry"""
+    parts = re.split(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")", strip_sql(sql))
+    return "".join(part if i % 2 else " ".join(part.split()) for i, part in enumerate(parts))
+
+class DataVersionMonitor:
+    """PRAGMA data_version read on a dedicated read-only connection.
+
+    SQLite bumps it whenever any other connection commits, so it is a cheap
+    way to tell whether anything derived from the data may be stale.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def current(self) -> int:
+        with self._lock:
+            if self._conn is None:
+                self._conn = open_readonly(self.path)
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+_monitor: Optional[DataVersionMonitor] = None
+
+def get_data_monitor() -> DataVersionMonitor:
+    global _monitor
+    with _pool_lock:
+        if _monitor is None:
+            _monitor = DataVersionMonitor(DB_PATH)
+    return _monitor
+
+class QueryResultCache:
+    """LRU cache of query results that is dropped whenever the database changes.
+
+    The data version monitor sees every commit by another connection, so a
+    cached result can never outlive the data it was read from.
+    """
+
+    def __init__(self, monitor: DataVersionMonitor, max_entries: int = RESULT_CACHE_MAX_ENTRIES,
+                 max_bytes: int = RESULT_CACHE_MAX_BYTES):
+        self.monitor = monitor
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._version = None
+        self._counts = {'hits': 0, 'misses': 0, 'invalidations': 0, 'evictions': 0}
+
+    def data_version(self) -> int:
+        """Current data version; clears the cache if it moved since the last check"""
+        version = self.monitor.current()
+        with self._lock:
+            if version != self._version:
+                if self._entries:
+                    self._counts['invalidations'] += 1
+                self._entries.clear()
+                self._bytes = 0
+                self._version = version
+            return version
+
+    def get(self, key: tuple) -> Optional[Dict]:
+        self.data_version()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counts['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counts['hits'] += 1
+            return entry[0]
+
+    def put(self, key: tuple, result: Dict, version: int) -> None:
+        size = len(repr(result))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            # The data moved while the query ran; this result may already be stale
+            if version != self._version:
+                return
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (result, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self._counts['evictions'] += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._counts, entries=len(self._entries), bytes=self._bytes)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        return stats
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+_result_cache: Optional[QueryResultCache] = None
+
+def get_result_cache() -> Optional[QueryResultCache]:
+    """Shared result cache, or None when SQL_AGENT_RESULT_CACHE is off"""
+    global _result_cache
+    if not RESULT_CACHE_ENABLED:
+        return None
+    monitor = get_data_monitor()
+    with _pool_lock:
+        if _result_cache is None:
+            _result_cache = QueryResultCache(monitor)
+    return _result_cache
+
+def execute_query(sql, max_rows: int = MAX_ROWS, max_tokens: int = MAX_RESULT_TOKENS, scan_limit: int = SCAN_LIMIT):
+    """Run a query, or serve it from the result cache when the data has not changed.
+
+    Returns (result, error); cache hits are marked with result['cached'].
+    """
+    try:
+        cache = get_result_cache()
+        if cache is None:
+            return run_query(sql, max_rows, max_tokens, scan_limit), None
+        key = (normalize_sql(sql), max_rows, max_tokens, scan_limit)
+        result = cache.get(key)
+        if result is not None:
+            return dict(result, cached=True), None
+        version = cache.data_version()
+        result = run_query(sql, max_rows, max_tokens, scan_limit)
+        cache.put(key, result, version)
+        return result, None
+    except Exception as e:
+        return None, str(e)
+
+def run_query(sql, max_rows: int = MAX_ROWS, max_tokens: int = MAX_RESULT_TOKENS, scan_limit: int = SCAN_LIMIT) -> Dict:
+    """Run a query, streaming at most scan_limit rows from the cursor.
+
+    The result keeps the first rows that fit in max_rows / max_tokens; when
+    rows are dropped it is marked truncated and carries a summary of
+    everything scanned.
+    """
+    with get_pool().connection() as conn, cost_guard.execution_budget(conn):
+        cursor = conn.execute(with_limit(sql, scan_limit + 1))
+        columns = [column[0] for column in cursor.description or ()]
+        summary = ResultSummary(columns, SUMMARY_TOP_K)
+        rows, tokens, overflow = [], 0, False
+        for row in stream_rows(cursor):
+            if summary.rows >= scan_limit:
+                overflow = True
+                break
+            summary.add(row)
+            tokens += estimate_tokens(repr(row)) + 1  # ", " separator in the prompt's list
+            if len(rows) < max_rows and tokens <= max_tokens:
+                rows.append(row)
+        cursor.close()
+        row_count = summary.rows
+        if overflow:
+            # Only the count is exact past the scan limit; statistics cover the scanned prefix
+            row_count = conn.execute(f"SELECT COUNT(*) FROM ({strip_sql(sql)})").fetchone()[0]
+    truncated = len(rows) < row_count
+    return {
+        'columns': columns,
+        'rows': rows,
+        'row_count': row_count,
+        'truncated': truncated,
+        'summary': summary.report() if truncated else None
+    }
+
+def check_query(sql: str) -> Optional[str]:
+    """Reason the query's plan is too expensive to run, or None; SQL errors propagate"""
+    with get_pool().connection() as conn:
+        return cost_guard.check_plan(conn, strip_sql(sql))
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the SQL agent database")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("setup", help="apply pending schema migrations")
+    load_parser = commands.add_parser("load", help="bulk load a CSV or JSONL file into a table")
+    load_parser.add_argument("table")
+    load_parser.add_argument("path")
+    load_parser.add_argument("--format", choices=["csv", "jsonl"])
+    load_parser.add_argument("--batch-size", type=int, default=50000)
+    args = parser.parse_args()
+
+    version = setup_database()
+    if args.command == "setup":
+        print(f"{DB_PATH} at schema version {version}")
+    elif args.command == "load":
+        start = time.perf_counter()
+        rows = bulk_load(args.table, args.path, args.format, args.batch_size)
+        elapsed = time.perf_counter() - start
+        print(f"Loaded {rows} rows into {args.table} in {elapsed:.2f}s ({rows / elapsed if elapsed else 0:.0f} rows/s)")
+
+if __name__ == "__main__":
+    main()
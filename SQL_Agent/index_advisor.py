@@ -0,0 +1,243 @@
+import logging
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import cost_guard
+import database
+import schema_catalog
+
+THRESHOLD = int(os.getenv("SQL_AGENT_INDEX_THRESHOLD", "5"))
+AUTO_CREATE = os.getenv("SQL_AGENT_AUTO_INDEX", "off").lower() in ("1", "on", "true")
+MAX_INDEX_COLUMNS = int(os.getenv("SQL_AGENT_MAX_INDEX_COLUMNS", "5"))
+
+logger = logging.getLogger("sql_agent.index_advisor")
+
+COMPARISON = re.compile(
+    r"(?:\b(\w+)\.)?\"?\b(\w+)\b\"?\s*(==|=|<>|!=|<=|>=|<|>|\bin\b|\bbetween\b|\blike\b|\bis\b)", re.IGNORECASE
+)
+WHERE = re.compile(r"\bwhere\b(.+?)(?=\bgroup\s+by\b|\border\s+by\b|\blimit\b|\bhaving\b|$)", re.IGNORECASE | re.DOTALL)
+GROUP_BY = re.compile(r"\bgroup\s+by\b(.+?)(?=\bhaving\b|\border\s+by\b|\blimit\b|$)", re.IGNORECASE | re.DOTALL)
+ORDER_BY = re.compile(r"\border\s+by\b(.+?)(?=\blimit\b|$)", re.IGNORECASE | re.DOTALL)
+EQUALITY = {"=", "==", "in", "is"}
+
+def quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+Pattern = Tuple[str, Tuple[str, ...], Optional[str], Tuple[str, ...], Tuple[str, ...]]
+
+def _columns_in(clause: str, table: str, columns: Dict[str, str], names: Dict[str, str]) -> List[str]:
+    found = []
+    for item in clause.split(","):
+        match = re.match(r"\s*(?:(\w+)\.)?\"?(\w+)\"?", item)
+        if match and _belongs(match.group(1), match.group(2), table, columns, names):
+            found.append(columns[match.group(2).lower()])
+    return found
+
+def _belongs(qualifier, column, table, columns, names) -> bool:
+    if column.lower() not in columns:
+        return False
+    return qualifier is None or names.get(qualifier.lower()) == table
+
+def workload_pattern(sql: str, table: str, columns: List[str], names: Dict[str, str]) -> Optional[Pattern]:
+    """(table, equality columns, range column, group/order columns, other referenced columns) for one scan"""
+    lookup = {column.lower(): column for column in columns}
+    sql = database.strip_sql(sql)
+    equality, ranges = set(), []
+    where = WHERE.search(sql)
+    if where:
+        for qualifier, column, operator in COMPARISON.findall(where.group(1)):
+            if _belongs(qualifier or None, column, table, lookup, names):
+                if operator.lower() in EQUALITY:
+                    equality.add(lookup[column.lower()])
+                elif lookup[column.lower()] not in ranges:
+                    ranges.append(lookup[column.lower()])
+    ordering = []
+    for clause in (GROUP_BY.search(sql), ORDER_BY.search(sql)):
+        if clause:
+            ordering += [c for c in _columns_in(clause.group(1), table, lookup, names) if c not in ordering]
+    if not (equality or ranges or ordering):
+        return None
+    keyed = equality | set(ranges[:1]) | set(ordering)
+    if re.search(r"\bselect\s+(\w+\.)?\*", sql, re.IGNORECASE):
+        others = ()  # SELECT * can't be covered without indexing every column
+    else:
+        words = {word.lower() for word in re.findall(r"\w+", sql)}
+        others = tuple(sorted(c for c in columns if c.lower() in words and c not in keyed))
+    return (table, tuple(sorted(equality)), ranges[0] if ranges else None, tuple(ordering), others)
+
+def index_columns(pattern: Pattern) -> List[str]:
+    """Equality columns, then GROUP/ORDER BY columns (so the index delivers the order), then the
+    range column, then the remaining referenced columns to make the index covering"""
+    _, equality, range_column, ordering, others = pattern
+    columns = list(equality)
+    columns += [c for c in ordering if c not in columns]
+    if range_column and range_column not in columns:
+        columns.append(range_column)
+    covering = columns + [c for c in others if c not in columns]
+    return covering if len(covering) <= MAX_INDEX_COLUMNS else columns[:MAX_INDEX_COLUMNS]
+
+class IndexAdvisor:
+    """Learns which full scans the workload keeps paying for and proposes indexes for them.
+
+    Every executed query's plan is inspected; scans with usable predicates or
+    ORDER BY / GROUP BY columns are counted by pattern. When a pattern reaches
+    `threshold`, a background worker proposes an index (and creates it when
+    `auto_create` is on) and keeps the before/after plan and latency of the
+    triggering query, so requests never wait on the measurement or the build.
+    A failed proposal is retried after another `threshold` occurrences.
+    """
+
+    def __init__(self, threshold: int = THRESHOLD, auto_create: bool = AUTO_CREATE, metrics=None):
+        self.threshold = threshold
+        self.auto_create = auto_create
+        self.metrics = metrics
+        self._lock = threading.Lock()
+        self._patterns: Counter = Counter()
+        self._proposals: Dict[Pattern, Dict] = {}
+        self._pending = set()
+        self._retry_at: Dict[Pattern, int] = {}
+        self._queue: "queue.Queue[Tuple[Pattern, str]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+
+    def record(self, sql: str) -> None:
+        """Account one query; patterns crossing the threshold are queued for the worker. Never raises."""
+        try:
+            self._record(database.strip_sql(sql))
+        except sqlite3.Error as e:
+            logger.debug("index advisor skipped query: %s", e)
+        except Exception:
+            logger.exception("index advisor failed to record query")
+
+    def _record(self, sql: str) -> None:
+        tables = {name: [column.name for column in table.columns]
+                  for name, table in schema_catalog.get_catalog().tables().items()}
+        with database.get_pool().connection() as conn:
+            plan = cost_guard.explain(conn, sql)
+        names = cost_guard.aliases(sql, tables)
+
+        for _, _, detail in plan:
+            match = cost_guard.SCAN.match(detail)
+            if not match:
+                continue
+            table = names.get(match.group(1).lower())
+            if table is None:
+                continue
+            pattern = workload_pattern(sql, table, tables[table], names)
+            if pattern is None:
+                continue
+            with self._lock:
+                self._patterns[pattern] += 1
+                if self._patterns[pattern] < self._retry_at.get(pattern, self.threshold) \
+                        or pattern in self._proposals or pattern in self._pending:
+                    continue
+                self._pending.add(pattern)
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(target=self._work, name="index-advisor", daemon=True)
+                    self._worker.start()
+            self._queue.put((pattern, sql))
+
+    def _work(self) -> None:
+        while True:
+            pattern, sql = self._queue.get()
+            try:
+                proposal = self._propose(pattern, sql)
+                with self._lock:
+                    self._proposals[pattern] = proposal
+            except Exception:
+                logger.exception("index proposal for %s failed", pattern[0])
+                with self._lock:
+                    self._retry_at[pattern] = self._patterns[pattern] + self.threshold
+            finally:
+                with self._lock:
+                    self._pending.discard(pattern)
+                self._queue.task_done()
+
+    def wait(self) -> None:
+        """Block until every queued proposal has been handled"""
+        self._queue.join()
+
+    def _propose(self, pattern: Pattern, sql: str) -> Dict:
+        table = pattern[0]
+        columns = index_columns(pattern)
+        name = "auto_" + "_".join(re.sub(r"\W", "", part) for part in [table] + columns)
+        ddl = f"CREATE INDEX IF NOT EXISTS {quote(name)} ON {quote(table)} ({', '.join(map(quote, columns))})"
+        proposal = {
+            'table': table, 'columns': columns, 'ddl': ddl, 'query': sql,
+            'occurrences': self._patterns[pattern], 'created': False,
+            'before_plan': self._plan(sql), 'before_ms': self._time(sql)
+        }
+        if self.auto_create:
+            self._create(ddl, table)
+            proposal.update(created=True, after_plan=self._plan(sql), after_ms=self._time(sql))
+        if self.metrics is not None:
+            self.metrics.inc("index_proposals_total", {'created': str(proposal['created']).lower()})
+        logger.info("index %s: %s", "created" if proposal['created'] else "proposed", ddl, extra={
+            k: v for k, v in proposal.items() if k in ('before_ms', 'after_ms', 'occurrences')
+        })
+        return proposal
+
+    @staticmethod
+    def _plan(sql: str) -> List[str]:
+        with database.get_pool().connection() as conn:
+            return [detail for _, _, detail in cost_guard.explain(conn, sql)]
+
+    @staticmethod
+    def _time(sql: str) -> Optional[float]:
+        """Latency of the query, or None when the cost guard would reject it (rejected queries are
+        recorded from their plan alone and never run)"""
+        if database.check_query(sql):
+            return None
+        start = time.perf_counter()
+        try:
+            database.run_query(sql)
+        except (sqlite3.Error, cost_guard.QueryInterrupted):
+            return None
+        return round((time.perf_counter() - start) * 1000, 3)
+
+    @staticmethod
+    def _create(ddl: str, table: str) -> None:
+        conn = sqlite3.connect(database.DB_PATH, timeout=database.BUSY_TIMEOUT)
+        try:
+            conn.execute(ddl)
+            conn.execute(f"ANALYZE {quote(table)}")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def apply(self, table: str, columns: List[str]) -> Optional[Dict]:
+        """Create a previously proposed index on demand"""
+        with self._lock:
+            proposal = next((p for p in self._proposals.values()
+                             if p['table'] == table and p['columns'] == columns), None)
+        if proposal is None or proposal['created']:
+            return proposal
+        try:
+            self._create(proposal['ddl'], table)
+            after = {'after_plan': self._plan(proposal['query']), 'after_ms': self._time(proposal['query'])}
+        except sqlite3.Error as e:
+            logger.exception("creating index failed: %s", proposal['ddl'])
+            return dict(proposal, error=str(e))
+        with self._lock:
+            proposal.update(created=True, **after)
+        if self.metrics is not None:
+            self.metrics.inc("index_proposals_total", {'created': "true"})
+        return proposal
+
+    def report(self) -> Dict:
+        with self._lock:
+            return {
+                'threshold': self.threshold,
+                'auto_create': self.auto_create,
+                'patterns': [
+                    {'table': p[0], 'equality': list(p[1]), 'range': p[2], 'ordering': list(p[3]), 'count': count}
+                    for p, count in self._patterns.most_common()
+                ],
+                'pending': len(self._pending),
+                'proposals': list(self._proposals.values())
+            }
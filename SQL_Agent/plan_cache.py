@@ -0,0 +1,220 @@
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import cost_guard
+from schema_catalog import SchemaCatalog
+
+logger = logging.getLogger("sql_agent.plan_cache")
+
+ENABLED = os.getenv("SQL_AGENT_PLAN_CACHE", "on").lower() not in ("0", "off", "false")
+MAX_ENTRIES = int(os.getenv("SQL_AGENT_PLAN_CACHE_MAX_ENTRIES", "1024"))
+# Known column values are re-read after the data or schema changes, at most this often (seconds);
+# columns with more distinct values, or whose scan exceeds REFRESH_TIMEOUT, are skipped
+REFRESH_INTERVAL = float(os.getenv("SQL_AGENT_PLAN_VALUES_REFRESH_INTERVAL", "5"))
+REFRESH_TIMEOUT = float(os.getenv("SQL_AGENT_PLAN_VALUES_TIMEOUT", "10"))
+MAX_DISTINCT = int(os.getenv("SQL_AGENT_PLAN_MAX_DISTINCT", "5000"))
+
+NUMBER = re.compile(r"(?<![\w.])\d+(?:\.\d+)?(?![\w.])")
+STRING_LITERAL = re.compile(r"('(?:[^']|'')*')")
+
+Literal = Tuple[str, str]  # (slot label, value)
+
+def quote_literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+class ValueIndex:
+    """Distinct values of low-cardinality text columns, matched case-insensitively in questions.
+
+    The index is rebuilt in a background thread when the schema or data
+    version moves; lookups keep using the previous index meanwhile, so parses
+    never wait on the column scans.
+    """
+
+    def __init__(self, catalog: SchemaCatalog, data_version: Callable[[], int]):
+        self.catalog = catalog
+        self.data_version = data_version
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._refreshing = False
+        self._started_at = 0.0
+        self._values: Dict[str, Tuple[str, str]] = {}
+        self._pattern: Optional[re.Pattern] = None
+
+    def refresh(self, stamp=None) -> None:
+        """Rebuild the index from the database; a column whose scan runs past the budget is skipped"""
+        try:
+            tables = self.catalog.tables()
+            values: Dict[str, Tuple[str, str]] = {}
+            with self.catalog.pool.connection() as conn:
+                for table, info in tables.items():
+                    for column in info.columns:
+                        if column.type and not any(t in column.type.upper() for t in ("CHAR", "CLOB", "TEXT")):
+                            continue
+                        quoted_table, quoted_column = (f'"{name.replace(chr(34), chr(34) * 2)}"' for name in (table, column.name))
+                        try:
+                            with cost_guard.execution_budget(conn, timeout=REFRESH_TIMEOUT):
+                                rows = conn.execute(
+                                    f"SELECT DISTINCT {quoted_column} FROM {quoted_table} "
+                                    f"WHERE typeof({quoted_column}) = 'text' LIMIT {MAX_DISTINCT + 1}"
+                                ).fetchall()
+                        except cost_guard.QueryInterrupted:
+                            continue
+                        if len(rows) > MAX_DISTINCT:
+                            continue
+                        for (value,) in rows:
+                            if len(value.strip()) >= 2:
+                                values.setdefault(value.lower(), (f"{table}.{column.name}", value))
+            # Longest first so multi-word values win over their prefixes
+            alternation = "|".join(re.escape(v) for v in sorted(values, key=len, reverse=True))
+            pattern = re.compile(rf"(?<!\w)(?:{alternation})(?!\w)", re.IGNORECASE) if values else None
+            with self._lock:
+                self._values, self._pattern, self._stamp = values, pattern, stamp
+        except Exception:
+            logger.exception("plan cache value index refresh failed")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _maybe_refresh(self) -> None:
+        self.catalog.tables()  # picks up schema changes
+        stamp = (self.catalog.version, self.data_version())
+        with self._lock:
+            if stamp == self._stamp or self._refreshing or time.time() - self._started_at < REFRESH_INTERVAL:
+                return
+            self._refreshing = True
+            self._started_at = time.time()
+        threading.Thread(target=self.refresh, args=(stamp,), name="plan-cache-values", daemon=True).start()
+
+    def extract(self, question: str) -> Tuple[str, List[Literal]]:
+        """Question skeleton with literals replaced by <slot> markers, plus the literals in order"""
+        self._maybe_refresh()
+        with self._lock:
+            pattern, values = self._pattern, self._values
+
+        spans = []
+        if pattern is not None:
+            spans = [(m.start(), m.end(), *values[m.group(0).lower()]) for m in pattern.finditer(question)]
+        taken = [(start, end) for start, end, _, _ in spans]
+        for m in NUMBER.finditer(question):
+            if not any(start <= m.start() < end for start, end in taken):
+                spans.append((m.start(), m.end(), "number", m.group(0)))
+        spans.sort()
+
+        parts, literals, position = [], [], 0
+        for start, end, label, value in spans:
+            parts.append(question[position:start])
+            parts.append(f"<{label}>")
+            literals.append((label, value))
+            position = end
+        parts.append(question[position:])
+        skeleton = " ".join(re.sub(r"[^\w<>.\s]", " ", "".join(parts).lower()).split())
+        return skeleton, literals
+
+def make_template(sql: str, literals: List[Literal]) -> Optional[str]:
+    """Turn generated SQL into a str.format template with one slot per literal.
+
+    Returns None when a literal does not appear exactly once in the SQL, since
+    binding a new value would then be ambiguous.
+    """
+    if len({value.lower() for _, value in literals}) != len(literals):
+        return None
+    # Odd segments are string literals, even segments are SQL text
+    segments = [segment.replace("{", "{{").replace("}", "}}") for segment in STRING_LITERAL.split(sql)]
+    for slot, (label, value) in enumerate(literals):
+        matches = []
+        for i, segment in enumerate(segments):
+            if label == "number" and i % 2 == 0:
+                matches += [(i, m) for m in re.finditer(rf"(?<![\w.{{]){re.escape(value)}(?![\w.}}])", segment)]
+            elif label != "number" and i % 2 == 1 and segment.lower() == quote_literal(value).lower():
+                matches.append((i, None))
+        if len(matches) != 1:
+            return None
+        i, match = matches[0]
+        marker = "{" + str(slot) + "}"
+        segments[i] = marker if match is None else segments[i][:match.start()] + marker + segments[i][match.end():]
+    return "".join(segments)
+
+def bind(template: str, literals: List[Literal]) -> str:
+    return template.format(*(value if label == "number" else quote_literal(value) for label, value in literals))
+
+class PlanCache:
+    """NL -> SQL templates keyed by question skeleton and schema version.
+
+    Questions that differ only in entity values or numbers ("What grades did
+    Alice get?" / "...Bob get?") reuse one generated query with the new
+    values bound, skipping the LLM round trip.
+    """
+
+    def __init__(self, catalog: SchemaCatalog, data_version: Callable[[], int],
+                 max_entries: int = MAX_ENTRIES, metrics=None):
+        self.catalog = catalog
+        self.max_entries = max_entries
+        self.metrics = metrics
+        self.values = ValueIndex(catalog, data_version)
+        self._lock = threading.Lock()
+        self._plans: "OrderedDict[tuple, str]" = OrderedDict()
+        self._llm_latency = 0.0
+        self._counts = {'hits': 0, 'misses': 0, 'stored': 0, 'uncacheable': 0, 'invalidated': 0, 'saved_seconds': 0.0}
+
+    def _count(self, name: str, amount: float = 1) -> None:
+        with self._lock:
+            self._counts[name] += amount
+        if self.metrics is not None:
+            self.metrics.inc(f"plan_cache_{name}_total", amount=amount)
+
+    def _key(self, question: str) -> Tuple[tuple, List[Literal]]:
+        skeleton, literals = self.values.extract(question)
+        return (self.catalog.version, skeleton, tuple(label for label, _ in literals)), literals
+
+    def lookup(self, question: str) -> Optional[str]:
+        """Bound SQL for a question whose shape has been answered before, else None"""
+        key, literals = self._key(question)
+        with self._lock:
+            template = self._plans.get(key)
+            if template is not None:
+                self._plans.move_to_end(key)
+        if template is None:
+            self._count('misses')
+            return None
+        self._count('hits')
+        self._count('saved_seconds', self._llm_latency)
+        return bind(template, literals)
+
+    def store(self, question: str, sql: str) -> bool:
+        key, literals = self._key(question)
+        template = make_template(sql, literals)
+        if template is None:
+            self._count('uncacheable')
+            return False
+        with self._lock:
+            self._plans[key] = template
+            self._plans.move_to_end(key)
+            while len(self._plans) > self.max_entries:
+                self._plans.popitem(last=False)
+        self._count('stored')
+        return True
+
+    def invalidate(self, question: str) -> None:
+        key, _ = self._key(question)
+        with self._lock:
+            removed = self._plans.pop(key, None) is not None
+        if removed:
+            self._count('invalidated')
+
+    def record_llm_latency(self, seconds: float) -> None:
+        """Feed measured parse latency; hits are credited with the running average"""
+        with self._lock:
+            self._llm_latency = seconds if not self._llm_latency else 0.8 * self._llm_latency + 0.2 * seconds
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._counts, entries=len(self._plans))
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        stats['saved_seconds'] = round(stats['saved_seconds'], 3)
+        return stats
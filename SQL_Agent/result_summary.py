@@ -0,0 +1,78 @@
+from collections import Counter
+from typing import Dict, List, Sequence
+
+MAX_DISTINCT = 1000
+MAX_GROUPS = 20
+
+class ColumnStats:
+    """Streaming statistics for one result column; memory is bounded by MAX_DISTINCT"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.nulls = 0
+        self.numeric = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.values = Counter()
+        self.overflow = False
+
+    def add(self, value) -> None:
+        self.count += 1
+        if value is None:
+            self.nulls += 1
+            return
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            self.numeric += 1
+            self.total += value
+        if self.min is None or _lt(value, self.min):
+            self.min = value
+        if self.max is None or _lt(self.max, value):
+            self.max = value
+        if not self.overflow:
+            self.values[value] += 1
+            if len(self.values) > MAX_DISTINCT:
+                self.overflow = True
+                self.values.clear()
+
+    def report(self) -> Dict:
+        report = {'nulls': self.nulls, 'min': self.min, 'max': self.max,
+                  'distinct': f">{MAX_DISTINCT}" if self.overflow else len(self.values)}
+        if self.numeric:
+            report['mean'] = round(self.total / self.numeric, 4)
+        # Group counts are only meaningful for low-cardinality, non-numeric columns
+        if not self.overflow and not self.numeric and 1 < len(self.values) <= MAX_GROUPS:
+            report['groups'] = dict(self.values.most_common())
+        return report
+
+def _lt(a, b) -> bool:
+    try:
+        return a < b
+    except TypeError:
+        # SQLite columns can mix types; order them like SQLite does (numbers before text)
+        return str(type(a).__name__) < str(type(b).__name__)
+
+class ResultSummary:
+    """Column statistics, group counts and the first rows of a streamed result set"""
+
+    def __init__(self, columns: Sequence[str], top_k: int = 10):
+        self.columns = list(columns)
+        self.top_k = top_k
+        self.stats = [ColumnStats(name) for name in self.columns]
+        self.head: List[tuple] = []
+        self.rows = 0
+
+    def add(self, row: Sequence) -> None:
+        self.rows += 1
+        if len(self.head) < self.top_k:
+            self.head.append(tuple(row))
+        for stats, value in zip(self.stats, row):
+            stats.add(value)
+
+    def report(self) -> Dict:
+        return {
+            'rows_scanned': self.rows,
+            'columns': {stats.name: stats.report() for stats in self.stats},
+            'top_rows': self.head
+        }
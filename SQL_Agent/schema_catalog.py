@@ -0,0 +1,120 @@
+import os
+import re
+import sqlite3
+import threading
+from collections import namedtuple
+from typing import Dict, List, Optional, Set
+
+import database
+
+MAX_TABLES = int(os.getenv("SQL_AGENT_SCHEMA_MAX_TABLES", "6"))
+MAX_COLUMNS = int(os.getenv("SQL_AGENT_SCHEMA_MAX_COLUMNS", "20"))
+
+Column = namedtuple("Column", "name type pk")
+Table = namedtuple("Table", "name columns foreign_keys")
+
+def tokens(text: str) -> Set[str]:
+    """Lowercase word stems; identifiers are split on underscores and camelCase"""
+    text = re.sub(r"([a-z])([A-Z])", r"\1 \2", text)
+    stems = set()
+    for word in re.findall(r"[a-z0-9]+", text.lower()):
+        if len(word) > 4 and word.endswith("ies"):
+            word = word[:-3] + "y"
+        elif len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        stems.add(word)
+    return stems
+
+def introspect(conn: sqlite3.Connection) -> Dict[str, Table]:
+    tables = {}
+    for (name,) in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type IN ('table', 'view') AND name NOT LIKE 'sqlite_%' ORDER BY name"
+    ):
+        quoted = name.replace('"', '""')
+        columns = [Column(row[1], row[2] or "", bool(row[5]))
+                   for row in conn.execute(f'PRAGMA table_info("{quoted}")')]
+        foreign_keys = {row[2] for row in conn.execute(f'PRAGMA foreign_key_list("{quoted}")')}
+        tables[name] = Table(name, columns, foreign_keys)
+    return tables
+
+class SchemaCatalog:
+    """Introspected schema, cached until PRAGMA schema_version changes.
+
+    `describe(question)` ranks tables and columns by token overlap with the
+    question so prompts only carry the relevant slice of a large schema.
+    """
+
+    def __init__(self, pool: database.ConnectionPool):
+        self.pool = pool
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+        self._tables: Dict[str, Table] = {}
+        self._tokens: Dict[str, Set[str]] = {}
+
+    def tables(self) -> Dict[str, Table]:
+        with self.pool.connection() as conn:
+            # schema_version is bumped by every CREATE/ALTER/DROP, so it is a cheap staleness check
+            version = conn.execute("PRAGMA schema_version").fetchone()[0]
+            with self._lock:
+                if version != self._version:
+                    self._tables = introspect(conn)
+                    self._tokens = {(table, column): tokens(column)
+                                    for table, info in self._tables.items() for column, _, _ in info.columns}
+                    self._tokens.update({table: tokens(table) for table in self._tables})
+                    self._version = version
+                return self._tables
+
+    @property
+    def version(self) -> Optional[int]:
+        return self._version
+
+    def rank(self, question: str, max_tables: int = MAX_TABLES) -> List[str]:
+        """Table names ordered by relevance; falls back to all tables when nothing matches"""
+        tables = self.tables()
+        words = tokens(question)
+        scores = {}
+        for name, info in tables.items():
+            score = 3 * len(words & self._tokens[name])
+            score += sum(len(words & self._tokens[(name, column.name)]) for column in info.columns)
+            scores[name] = score
+        ranked = sorted(tables, key=lambda name: (-scores[name], name))
+        selected = [name for name in ranked if scores[name] > 0][:max_tables] or ranked[:max_tables]
+        # Pull in referenced tables so the model can write the joins
+        for name in list(selected):
+            for target in sorted(tables[name].foreign_keys):
+                if target in tables and target not in selected and len(selected) < max_tables:
+                    selected.append(target)
+        return selected
+
+    def columns(self, table: str, question: str, max_columns: int = MAX_COLUMNS) -> List[Column]:
+        columns = self.tables()[table].columns
+        if len(columns) <= max_columns:
+            return columns
+        words = tokens(question)
+        # Keys always survive pruning; the rest keep their declared order
+        keep = {column.name for column in columns if column.pk}
+        scored = sorted(columns, key=lambda column: -len(words & self._tokens[(table, column.name)]))
+        for column in scored:
+            if len(keep) >= max_columns:
+                break
+            keep.add(column.name)
+        return [column for column in columns if column.name in keep]
+
+    def describe(self, question: str, max_tables: int = MAX_TABLES, max_columns: int = MAX_COLUMNS) -> str:
+        """Compact `table(column TYPE, ...)` lines for the tables relevant to a question"""
+        lines = []
+        for table in self.rank(question, max_tables):
+            columns = ", ".join(f"{column.name} {column.type}".strip()
+                                for column in self.columns(table, question, max_columns))
+            lines.append(f"{table}({columns})")
+        return "\n".join(lines)
+
+_catalog: Optional[SchemaCatalog] = None
+_catalog_lock = threading.Lock()
+
+def get_catalog() -> SchemaCatalog:
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = SchemaCatalog(database.get_pool())
+    return _catalog
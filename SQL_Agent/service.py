@@ -0,0 +1,51 @@
+import argparse
+import os
+import sys
+import time
+import database
+from agent import ADVISOR, METRICS, get_graph, run_agent
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from shared.http_service import make_server
+from shared.instrumentation import configure_logging
+
+class SQLAgentService:
+    """Resident SQL agent: the database is set up and the graph compiled once,
+    then questions are answered concurrently against the warm graph."""
+
+    def __init__(self):
+        self.graph = get_graph()
+
+    def ask(self, question: str) -> dict:
+        if not question or not question.strip():
+            raise ValueError("question is required")
+        start = time.perf_counter()
+        response = run_agent(question)
+        return {"response": response, "elapsed": round(time.perf_counter() - start, 3)}
+
+    def serve(self, host: str = "127.0.0.1", port: int = 8002, max_concurrency: int = 16):
+        server = make_server(host, port,
+                             {"/ask": lambda payload: self.ask(payload["question"]),
+                              "/indexes/apply": lambda payload: ADVISOR.apply(payload["table"], payload["columns"]) or {}},
+                             {"/metrics": METRICS.prometheus, "/metrics.json": METRICS.report, "/indexes": ADVISOR.report},
+                             max_concurrency=max_concurrency)
+        print(f"SQL agent service listening on http://{host}:{port} (POST /ask, GET /metrics, GET /indexes)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            database.get_pool().close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the SQL agent as a long-running HTTP service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8002)
+    parser.add_argument("--max-concurrency", type=int, default=16)
+    args = parser.parse_args()
+    configure_logging()
+    SQLAgentService().serve(args.host, args.port, args.max_concurrency)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+import sqlite3
+
+import cost_guard
+
+def test_scan_matches_old_and_new_plan_text():
+    assert cost_guard.SCAN.match("SCAN students").group(1) == "students"
+    assert cost_guard.SCAN.match("SCAN TABLE students").group(1) == "students"
+
+def test_limit_caps_unordered_scans_only(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "students.db"))
+    conn.execute("CREATE TABLE students (name TEXT, subject TEXT, grade INTEGER)")
+    conn.executemany("INSERT INTO students VALUES (?, ?, ?)", [(f"s{i}", "Math", i % 100) for i in range(500)])
+    conn.commit()
+
+    assert cost_guard.check_plan(conn, "SELECT * FROM students", max_scan_rows=100)
+    assert cost_guard.check_plan(conn, "SELECT * FROM students LIMIT 10", max_scan_rows=100) is None
+    assert cost_guard.check_plan(conn, "SELECT * FROM students LIMIT 10 OFFSET 200", max_scan_rows=100)
+    assert cost_guard.check_plan(conn, "SELECT * FROM students ORDER BY grade LIMIT 10", max_scan_rows=100)
+    assert cost_guard.check_plan(conn, "SELECT subject, COUNT(*) FROM students GROUP BY subject LIMIT 10",
+                                 max_scan_rows=100)
+    conn.close()
@@ -0,0 +1,36 @@
+import sqlite3
+
+import pytest
+
+import database
+
+def test_closed_pool_closes_returned_connections(tmp_path):
+    path = str(tmp_path / "students.db")
+    sqlite3.connect(path).close()
+    pool = database.ConnectionPool(path, size=2)
+    idle, busy = pool.acquire(), pool.acquire()
+    pool.release(idle)
+
+    pool.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        idle.execute("SELECT 1")
+    busy.execute("SELECT 1")  # still usable until it is returned
+    pool.release(busy)
+    with pytest.raises(sqlite3.ProgrammingError):
+        busy.execute("SELECT 1")
+    with pytest.raises(sqlite3.ProgrammingError):
+        pool.acquire()
+
+def test_results_over_the_token_budget_are_summarized(tmp_path, monkeypatch):
+    path = str(tmp_path / "students.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE notes (body TEXT)")
+    conn.executemany("INSERT INTO notes VALUES (?)", [("x" * 34,)] * 3)  # repr ('xxx...',) is 40 chars = 10 tokens
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(database, "_pool", database.ConnectionPool(path))
+
+    fits = database.run_query("SELECT body FROM notes", max_tokens=33)
+    assert len(fits['rows']) == 3 and not fits['truncated'] and fits['summary'] is None
+    over = database.run_query("SELECT body FROM notes", max_tokens=32)
+    assert len(over['rows']) == 2 and over['truncated'] and over['summary']['rows_scanned'] == 3
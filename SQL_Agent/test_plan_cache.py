@@ -0,0 +1,55 @@
+import sqlite3
+
+import database
+from plan_cache import PlanCache, bind, make_template
+from schema_catalog import SchemaCatalog
+
+def test_text_literals_become_slots_and_rebind():
+    literals = [("students.name", "Alice"), ("students.subject", "Math")]
+    template = make_template("SELECT grade FROM students WHERE name = 'Alice' AND subject = 'math'", literals)
+    assert template == "SELECT grade FROM students WHERE name = {0} AND subject = {1}"
+    assert bind(template, [("students.name", "O'Neil"), ("students.subject", "Science")]) == \
+        "SELECT grade FROM students WHERE name = 'O''Neil' AND subject = 'Science'"
+
+def test_numbers_only_match_outside_string_literals():
+    literals = [("number", "3")]
+    template = make_template("SELECT name FROM students WHERE subject = 'Room 3' ORDER BY grade DESC LIMIT 3", literals)
+    assert template == "SELECT name FROM students WHERE subject = 'Room 3' ORDER BY grade DESC LIMIT {0}"
+    assert bind(template, [("number", "10")]).endswith("'Room 3' ORDER BY grade DESC LIMIT 10")
+    # Only inside a literal: nothing to bind
+    assert make_template("SELECT name FROM students WHERE subject = 'Room 3'", literals) is None
+
+def test_ambiguous_literals_are_not_cached():
+    # The number appears twice in the SQL
+    assert make_template("SELECT name FROM students WHERE grade > 80 LIMIT 80", [("number", "80")]) is None
+    # The same value appears twice in the question
+    assert make_template("SELECT 1 FROM students WHERE name = 'Bob'",
+                         [("students.name", "Bob"), ("students.name", "bob")]) is None
+    # The value is used in a way that can't be rebound (inside LIKE)
+    assert make_template("SELECT 1 FROM students WHERE name LIKE '%Bob%'", [("students.name", "Bob")]) is None
+
+def test_braces_in_sql_survive_binding():
+    template = make_template("SELECT '{x}' AS tag FROM students WHERE name = 'Bob'", [("students.name", "Bob")])
+    assert bind(template, [("students.name", "Eve")]) == "SELECT '{x}' AS tag FROM students WHERE name = 'Eve'"
+
+def test_questions_of_the_same_shape_share_a_plan(tmp_path):
+    path = str(tmp_path / "students.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE students (name TEXT, subject TEXT, grade INTEGER)")
+    conn.executemany("INSERT INTO students VALUES (?, ?, ?)",
+                     [("Alice", "Math", 85), ("Bob", "Science", 88), ("Mary Ann", "Math", 70)])
+    conn.commit()
+    conn.close()
+
+    cache = PlanCache(SchemaCatalog(database.ConnectionPool(path)), data_version=lambda: 0)
+    cache.values.refresh()
+    skeleton, literals = cache.values.extract("What grades did mary ann get in MATH?")
+    assert skeleton == "what grades did <students.name> get in <students.subject>"
+    assert literals == [("students.name", "Mary Ann"), ("students.subject", "Math")]
+
+    assert cache.store("What grades did Alice get in Math?",
+                       "SELECT grade FROM students WHERE name = 'Alice' AND subject = 'Math'")
+    assert cache.lookup("what grades did bob get in science") == \
+        "SELECT grade FROM students WHERE name = 'Bob' AND subject = 'Science'"
+    assert cache.lookup("Who got the highest grade?") is None
+    assert cache.stats()['hits'] == 1
@@ -0,0 +1,82 @@
+"""Local fake of the OpenAI chat completions endpoint for testing the LLM client.
+
+    python -m shared.fake_openai --port 8099 --latency 0.2 --rate-limit-every 5
+    OPENAI_BASE_URL=http://127.0.0.1:8099/v1 OPENAI_API_KEY=fake python agent.py
+
+Responses echo the prompt. --rate-limit-every N makes every Nth request fail
+with a 429 and a Retry-After header, for exercising retry and backoff.
+"""
+import argparse
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+def make_fake_server(host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                     rate_limit_every: int = 0, retry_after: float = 0.05) -> ThreadingHTTPServer:
+    counter = itertools.count(1)
+    lock = threading.Lock()
+    stats = {'requests': 0, 'rate_limited': 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, status, body, headers=None):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            with lock:
+                number = next(counter)
+                stats['requests'] += 1
+            if rate_limit_every and number % rate_limit_every == 0:
+                with lock:
+                    stats['rate_limited'] += 1
+                self._send(429, {"error": {"message": "Rate limit reached", "type": "requests"}},
+                           {"Retry-After": str(retry_after)})
+                return
+            time.sleep(latency)
+            prompt = "\n".join(str(m.get("content", "")) for m in payload.get("messages", []))
+            content = f"echo: {prompt}"
+            self._send(200, {
+                "id": f"chatcmpl-fake-{number}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": payload.get("model", "fake"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4,
+                          "total_tokens": (len(prompt) + len(content)) // 4}
+            })
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    server.stats = stats
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake OpenAI chat completions endpoint")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--rate-limit-every", type=int, default=0)
+    args = parser.parse_args()
+    server = make_fake_server(args.host, args.port, args.latency, args.rate_limit_every)
+    print(f"Fake OpenAI endpoint on http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
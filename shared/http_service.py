@@ -0,0 +1,71 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Union
+
+PostHandler = Callable[[dict], dict]
+GetHandler = Callable[[], Union[dict, str]]
+
+def make_server(host: str, port: int, post_routes: Dict[str, PostHandler],
+                get_routes: Dict[str, GetHandler] = None, max_concurrency: int = 8) -> ThreadingHTTPServer:
+    """Small JSON-over-HTTP server for the resident agent services.
+
+    POST routes take the decoded JSON body and return a dict. GET routes return
+    a dict (served as JSON) or a string (served as text/plain). Requests run on
+    their own threads, with at most max_concurrency handlers executing at once.
+    """
+    get_routes = {"/health": lambda: {"status": "ok"}, **(get_routes or {})}
+    slots = threading.BoundedSemaphore(max_concurrency)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, status: int, body: Union[dict, str]):
+            if isinstance(body, str):
+                data, content_type = body.encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8"
+            else:
+                data, content_type = json.dumps(body, default=str).encode("utf-8"), "application/json"
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            route = get_routes.get(self.path.split("?", 1)[0])
+            if route is None:
+                self._send(404, {"error": f"Unknown path {self.path}"})
+                return
+            self._send(200, route())
+
+        def do_POST(self):
+            route = post_routes.get(self.path)
+            if route is None:
+                self._send(404, {"error": f"Unknown path {self.path}"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError as e:
+                self._send(400, {"error": f"Invalid JSON: {e}"})
+                return
+            with slots:
+                try:
+                    result = route(payload)
+                except KeyError as e:
+                    self._send(400, {"error": f"Missing field {e}"})
+                    return
+                except ValueError as e:
+                    self._send(400, {"error": str(e)})
+                    return
+                except Exception as e:
+                    self._send(500, {"error": str(e)})
+                    return
+            self._send(200, result)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
@@ -0,0 +1,240 @@
+import contextvars
+import functools
+import json
+import logging
+import os
+import statistics
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional, Tuple
+
+# Node currently executing in this context; LLM token usage and retries are attributed to it
+current_node: contextvars.ContextVar = contextvars.ContextVar("current_node", default="")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+TOKEN_BUCKETS = (16, 64, 256, 512, 1024, 2048, 4096, 8192, 16384)
+
+class Histogram:
+    """Cumulative-bucket histogram plus a bounded window of recent samples for percentiles"""
+
+    def __init__(self, buckets: Tuple[float, ...], window: int = 2048):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.samples = deque(maxlen=window)
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        self.samples.append(value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def percentile(self, q: float) -> float:
+        if not self.samples:
+            return 0.0
+        if len(self.samples) == 1:
+            return self.samples[0]
+        return statistics.quantiles(self.samples, n=100, method="inclusive")[int(q * 100) - 1]
+
+class MetricsRegistry:
+    """Thread-safe counters, gauges and histograms exported as JSON or Prometheus text"""
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self.enabled = os.getenv("METRICS_ENABLED", "on").lower() not in ("0", "off", "false")
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple, float] = {}
+        self._gauges: Dict[Tuple, float] = {}
+        self._histograms: Dict[Tuple, Histogram] = {}
+
+    @staticmethod
+    def _key(name: str, labels: Optional[Dict]) -> Tuple:
+        return (name, tuple(sorted((labels or {}).items())))
+
+    def inc(self, name: str, labels: Dict = None, amount: float = 1) -> None:
+        if not self.enabled:
+            return
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def set_gauge(self, name: str, value: float, labels: Dict = None) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._gauges[self._key(name, labels)] = value
+
+    def add_gauge(self, name: str, amount: float, labels: Dict = None) -> None:
+        if not self.enabled:
+            return
+        key = self._key(name, labels)
+        with self._lock:
+            self._gauges[key] = self._gauges.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, labels: Dict = None, buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        if not self.enabled:
+            return
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+    def report(self) -> Dict:
+        with self._lock:
+            return {
+                'counters': [
+                    {'name': name, 'labels': dict(labels), 'value': value}
+                    for (name, labels), value in sorted(self._counters.items())
+                ],
+                'gauges': [
+                    {'name': name, 'labels': dict(labels), 'value': value}
+                    for (name, labels), value in sorted(self._gauges.items())
+                ],
+                'histograms': [
+                    {
+                        'name': name,
+                        'labels': dict(labels),
+                        'count': histogram.count,
+                        'sum': round(histogram.sum, 6),
+                        'p50': round(histogram.percentile(0.50), 6),
+                        'p95': round(histogram.percentile(0.95), 6),
+                        'buckets': dict(zip(map(str, histogram.buckets), histogram.counts))
+                    }
+                    for (name, labels), histogram in sorted(self._histograms.items(), key=lambda item: item[0])
+                ]
+            }
+
+    def prometheus(self) -> str:
+        def fmt_labels(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{k}="{str(v)}"' for k, v in pairs) + "}"
+
+        lines = []
+        with self._lock:
+            for name in sorted({name for name, _ in self._counters}):
+                metric = f"{self.namespace}_{name}"
+                lines.append(f"# TYPE {metric} counter")
+                for (counter_name, labels), value in sorted(self._counters.items()):
+                    if counter_name == name:
+                        lines.append(f"{metric}{fmt_labels(labels)} {value}")
+            for name in sorted({name for name, _ in self._gauges}):
+                metric = f"{self.namespace}_{name}"
+                lines.append(f"# TYPE {metric} gauge")
+                for (gauge_name, labels), value in sorted(self._gauges.items()):
+                    if gauge_name == name:
+                        lines.append(f"{metric}{fmt_labels(labels)} {value}")
+            for name in sorted({name for name, _ in self._histograms}):
+                metric = f"{self.namespace}_{name}"
+                lines.append(f"# TYPE {metric} histogram")
+                for (histogram_name, labels), histogram in sorted(self._histograms.items(), key=lambda item: item[0]):
+                    if histogram_name != name:
+                        continue
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        lines.append(f"{metric}_bucket{fmt_labels(labels, [('le', bound)])} {count}")
+                    lines.append(f"{metric}_bucket{fmt_labels(labels, [('le', '+Inf')])} {histogram.count}")
+                    lines.append(f"{metric}_sum{fmt_labels(labels)} {histogram.sum}")
+                    lines.append(f"{metric}_count{fmt_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def record_retry(self, kind: str) -> None:
+        self.inc("retries_total", {'node': current_node.get() or "none", 'kind': kind})
+
+    def record_tokens(self, prompt_tokens: int, completion_tokens: int) -> None:
+        labels = {'node': current_node.get() or "none"}
+        self.inc("llm_calls_total", labels)
+        self.inc("llm_prompt_tokens_total", labels, prompt_tokens)
+        self.inc("llm_completion_tokens_total", labels, completion_tokens)
+        self.observe("llm_prompt_tokens", prompt_tokens, labels, TOKEN_BUCKETS)
+        self.observe("llm_completion_tokens", completion_tokens, labels, TOKEN_BUCKETS)
+
+    def instrument(self, name: str, fn: Callable, logger: logging.Logger = None) -> Callable:
+        """Wrap a graph node to record wall time, errors and the size of the state update it returns"""
+
+        @functools.wraps(fn)
+        def node(state):
+            token = current_node.set(name)
+            start = time.perf_counter()
+            try:
+                update = fn(state)
+            except Exception:
+                self.inc("node_errors_total", {'node': name})
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                current_node.reset(token)
+                self.observe("node_duration_seconds", elapsed, {'node': name})
+            if self.enabled:
+                size = payload_size(update)
+                self.observe("node_payload_bytes", size, {'node': name}, SIZE_BUCKETS)
+                if logger is not None and logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("node finished", extra={'node': name, 'duration_ms': round(elapsed * 1000, 2), 'payload_bytes': size})
+            return update
+
+        return node
+
+def payload_size(update) -> int:
+    if hasattr(update, "model_dump_json"):
+        return len(update.model_dump_json())
+    return len(json.dumps(update, default=str))
+
+def token_usage_handler(registry: MetricsRegistry):
+    """LangChain callback handler that feeds prompt/completion token counts into the registry"""
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class TokenUsageHandler(BaseCallbackHandler):
+        def on_llm_end(self, response, **kwargs):
+            usage = (response.llm_output or {}).get("token_usage") or {}
+            prompt_tokens = usage.get("prompt_tokens", 0)
+            completion_tokens = usage.get("completion_tokens", 0)
+            if not usage and response.generations and response.generations[0]:
+                metadata = getattr(getattr(response.generations[0][0], "message", None), "usage_metadata", None) or {}
+                prompt_tokens = metadata.get("input_tokens", 0)
+                completion_tokens = metadata.get("output_tokens", 0)
+            registry.record_tokens(prompt_tokens, completion_tokens)
+
+    return TokenUsageHandler()
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including any structured fields passed via extra="""
+
+    RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage()
+        }
+        entry.update({k: v for k, v in vars(record).items() if k not in self.RESERVED})
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+def configure_logging(level: str = None, fmt: str = None) -> None:
+    """Configure root logging from LOG_LEVEL / LOG_FORMAT ("text" or "json").
+
+    Setting LOG_LEVEL=WARNING silences per-node progress logging on the hot path.
+    """
+    level = (level or os.getenv("LOG_LEVEL", "INFO")).upper()
+    fmt = fmt or os.getenv("LOG_FORMAT", "text")
+    handler = logging.StreamHandler()
+    handler.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter("%(message)s"))
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(level)
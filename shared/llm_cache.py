@@ -0,0 +1,145 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+class CachedResponse:
+    """Stands in for the chat model's message on a cache hit"""
+
+    def __init__(self, content: str):
+        self.content = content
+        self.response_metadata = {'cached': True}
+
+class ResponseCache:
+    """Two-tier prompt -> response cache: in-memory LRU in front of an optional SQLite file.
+
+    Both tiers expire entries after `ttl` seconds; the disk tier is capped at
+    `max_entries` rows and `max_bytes` of content by evicting the least recently used.
+    """
+
+    def __init__(self, path: Optional[str] = None, memory_entries: int = 1024,
+                 max_entries: int = 100000, max_bytes: int = 64 * 1024 * 1024,
+                 ttl: float = 7 * 86400, metrics=None):
+        self.memory_entries = memory_entries
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.metrics = metrics
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counts = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'writes': 0}
+        self._conn = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                content TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                size INTEGER NOT NULL DEFAULT 0
+            )
+            ''')
+            # Files written before the byte cap have no size column
+            if "size" not in [row[1] for row in self._conn.execute("PRAGMA table_info(llm_cache)")]:
+                self._conn.execute("ALTER TABLE llm_cache ADD COLUMN size INTEGER NOT NULL DEFAULT 0")
+                self._conn.execute("UPDATE llm_cache SET size = length(CAST(content AS BLOB))")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_lru ON llm_cache (last_access)")
+            self._conn.commit()
+
+    @staticmethod
+    def key(model, temperature, prompt: str) -> str:
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        return f"{model}|{temperature}|{digest}"
+
+    def _count(self, name: str) -> None:
+        self._counts[name] += 1
+        if self.metrics is not None:
+            self.metrics.inc(f"llm_cache_{name}_total")
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                content, created_at = entry
+                if now - created_at <= self.ttl:
+                    self._memory.move_to_end(key)
+                    self._count('memory_hits')
+                    return content
+                del self._memory[key]
+
+            if self._conn is not None:
+                row = self._conn.execute("SELECT content, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+                if row is not None and now - row[1] <= self.ttl:
+                    self._conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+                    self._conn.commit()
+                    self._remember(key, row[0], row[1])
+                    self._count('disk_hits')
+                    return row[0]
+                if row is not None:
+                    self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self._conn.commit()
+
+            self._count('misses')
+            return None
+
+    def put(self, key: str, content: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._remember(key, content, now)
+            self._count('writes')
+            if self._conn is None:
+                return
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, content, created_at, last_access, size) VALUES (?, ?, ?, ?, ?)",
+                (key, content, now, now, len(content.encode("utf-8")))
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        # Walk from least recently used until both limits are satisfied
+        doomed = []
+        for key, size in self._conn.execute("SELECT key, size FROM llm_cache ORDER BY last_access"):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            count -= 1
+            total -= size
+        self._conn.executemany("DELETE FROM llm_cache WHERE key = ?", doomed)
+
+    def _remember(self, key: str, content: str, created_at: float) -> None:
+        self._memory[key] = (content, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            counts = dict(self._counts)
+        lookups = counts['memory_hits'] + counts['disk_hits'] + counts['misses']
+        counts['hit_rate'] = round((counts['memory_hits'] + counts['disk_hits']) / lookups, 4) if lookups else 0.0
+        return counts
+
+def cache_from_env(default_path: Optional[str], metrics=None) -> Optional[ResponseCache]:
+    """ResponseCache configured from LLM_CACHE* variables, or None unless LLM_CACHE is on"""
+    if os.getenv("LLM_CACHE", "off").lower() not in ("1", "on", "true"):
+        return None
+    path = os.getenv("LLM_CACHE_PATH", default_path)
+    return ResponseCache(
+        path=path or None,
+        memory_entries=int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "1024")),
+        max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "100000")),
+        max_bytes=int(os.getenv("LLM_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+        ttl=float(os.getenv("LLM_CACHE_TTL", str(7 * 86400))),
+        metrics=metrics
+    )
@@ -0,0 +1,186 @@
+import logging
+import math
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional, Tuple
+from shared.llm_cache import CachedResponse, ResponseCache, cache_from_env
+from shared.rate_limit import TokenBucket
+
+logger = logging.getLogger("llm_client")
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+RETRYABLE_NAMES = ("RateLimit", "Timeout", "APIConnectionError", "InternalServerError", "ServiceUnavailable")
+
+def is_retryable(error: Exception) -> bool:
+    """429s, timeouts, connection errors and 5xx responses are worth retrying"""
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    if status in RETRYABLE_STATUS:
+        return True
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    return any(name in type(error).__name__ for name in RETRYABLE_NAMES)
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Server-provided Retry-After delay in seconds, if any"""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after") or headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / 4)
+
+class LLMClient:
+    """Shared wrapper around a LangChain chat model (anything with .invoke(prompt)).
+
+    - single-flight: identical prompts already in flight share one request
+    - token buckets for requests and tokens per minute across all callers
+    - jittered exponential backoff on 429s, timeouts and 5xx errors
+    - queue depth, in-flight, coalescing and retry metrics
+    - optional response cache, used only for temperature 0 unless forced
+    """
+
+    def __init__(self, llm, requests_per_minute: float = None, tokens_per_minute: float = None,
+                 max_retries: int = 3, backoff: float = 1.0, max_backoff: float = 30.0,
+                 expected_completion_tokens: int = 500, metrics=None,
+                 cache: Optional[ResponseCache] = None, cache_nondeterministic: bool = False,
+                 count_tokens: Callable[[str], int] = estimate_tokens, sleep: Callable[[float], None] = time.sleep):
+        self.llm = llm
+        self.model = getattr(llm, "model_name", None) or getattr(llm, "model", None) or type(llm).__name__
+        self.temperature = getattr(llm, "temperature", None)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.expected_completion_tokens = expected_completion_tokens
+        self.metrics = metrics
+        self.cache = cache
+        self.cache_nondeterministic = cache_nondeterministic
+        self.count_tokens = count_tokens
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._inflight: Dict[Tuple, Future] = {}
+        self._counts = {'requests': 0, 'coalesced': 0, 'retries': 0, 'failures': 0, 'queue_depth': 0, 'in_flight': 0}
+        self.request_bucket = None
+        self.token_bucket = None
+        self.set_limits(requests_per_minute, tokens_per_minute)
+
+    @classmethod
+    def from_env(cls, llm, metrics=None, cache_path: str = None, **kwargs) -> "LLMClient":
+        """Limits from OPENAI_REQUESTS_PER_MINUTE / OPENAI_TOKENS_PER_MINUTE / OPENAI_MAX_RETRIES,
+        response cache from LLM_CACHE / LLM_CACHE_PATH (cache_path is the default file)"""
+        rpm = os.getenv("OPENAI_REQUESTS_PER_MINUTE")
+        tpm = os.getenv("OPENAI_TOKENS_PER_MINUTE")
+        return cls(llm,
+                   requests_per_minute=float(rpm) if rpm else None,
+                   tokens_per_minute=float(tpm) if tpm else None,
+                   max_retries=int(os.getenv("OPENAI_MAX_RETRIES", "3")),
+                   metrics=metrics,
+                   cache=cache_from_env(cache_path, metrics),
+                   cache_nondeterministic=os.getenv("LLM_CACHE_FORCE", "off").lower() in ("1", "on", "true"),
+                   **kwargs)
+
+    def set_limits(self, requests_per_minute: float = None, tokens_per_minute: float = None) -> None:
+        """Replace the limits that are given; a limit left as None keeps its current value"""
+        # Allow roughly ten seconds' worth of burst before callers start queueing
+        if requests_per_minute:
+            self.request_bucket = TokenBucket.per_minute(requests_per_minute, max(1.0, requests_per_minute / 6))
+        if tokens_per_minute:
+            self.token_bucket = TokenBucket.per_minute(tokens_per_minute, max(1.0, tokens_per_minute / 6))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._counts)
+        if self.cache is not None:
+            stats['cache'] = self.cache.stats()
+        return stats
+
+    def _count(self, key: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counts[key] += amount
+            value = self._counts[key]
+        if self.metrics is not None:
+            if key in ('queue_depth', 'in_flight'):
+                self.metrics.set_gauge(f"llm_{key}", value)
+            else:
+                self.metrics.inc(f"llm_client_{key}_total", amount=amount)
+
+    def cacheable(self, force: bool = False) -> bool:
+        """Sampling at temperature > 0 is not repeatable, so it bypasses the cache unless forced"""
+        return self.cache is not None and (self.temperature == 0 or force or self.cache_nondeterministic)
+
+    def invoke(self, prompt, force_cache: bool = False, **kwargs):
+        cache_key = None
+        if self.cacheable(force_cache) and not kwargs:
+            cache_key = ResponseCache.key(self.model, self.temperature, str(prompt))
+            content = self.cache.get(cache_key)
+            if content is not None:
+                return CachedResponse(content)
+
+        key = (self.model, self.temperature, str(prompt), tuple(sorted(kwargs.items())))
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        if not leader:
+            self._count('coalesced')
+            return future.result()
+
+        try:
+            result = self._invoke_with_retries(prompt, **kwargs)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            if cache_key is not None and isinstance(getattr(result, "content", None), str):
+                self.cache.put(cache_key, result.content)
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _wait_for_capacity(self, tokens: int) -> None:
+        if self.request_bucket is None and self.token_bucket is None:
+            return
+        self._count('queue_depth')
+        try:
+            waited = 0.0
+            if self.request_bucket is not None:
+                waited += self.request_bucket.acquire()
+            if self.token_bucket is not None:
+                waited += self.token_bucket.acquire(tokens)
+        finally:
+            self._count('queue_depth', -1)
+        if waited and self.metrics is not None:
+            self.metrics.observe("llm_queue_wait_seconds", waited)
+
+    def _invoke_with_retries(self, prompt, **kwargs):
+        tokens = self.count_tokens(str(prompt)) + self.expected_completion_tokens
+        attempt = 0
+        while True:
+            self._wait_for_capacity(tokens)
+            self._count('requests')
+            self._count('in_flight')
+            try:
+                return self.llm.invoke(prompt, **kwargs)
+            except Exception as e:
+                error = e
+            finally:
+                self._count('in_flight', -1)
+
+            if attempt >= self.max_retries or not is_retryable(error):
+                self._count('failures')
+                raise error
+            # Full jitter keeps many callers from retrying in lockstep after a shared 429
+            delay = retry_after(error) or random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+            attempt += 1
+            self._count('retries')
+            if self.metrics is not None:
+                self.metrics.record_retry("llm")
+            logger.warning("LLM call failed (%s), retry %d/%d in %.2fs", type(error).__name__, attempt, self.max_retries, delay)
+            self._sleep(delay)
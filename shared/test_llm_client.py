@@ -0,0 +1,140 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from shared.fake_openai import make_fake_server
+from shared.llm_cache import ResponseCache
+from shared.llm_client import LLMClient
+from shared.rate_limit import TokenBucket
+
+class HTTPStatusError(Exception):
+    def __init__(self, status_code, headers):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = type("Response", (), {"headers": headers, "status_code": status_code})()
+
+class FakeEndpointChat:
+    """Minimal chat model that talks to the fake OpenAI endpoint over HTTP"""
+    model_name = "fake"
+    temperature = 0
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+
+    def invoke(self, prompt):
+        body = json.dumps({"model": self.model_name, "messages": [{"role": "user", "content": prompt}]}).encode()
+        request = urllib.request.Request(f"{self.base_url}/chat/completions", data=body, method="POST",
+                                         headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request) as response:
+                payload = json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            raise HTTPStatusError(e.code, dict(e.headers))
+        return type("Message", (), {"content": payload["choices"][0]["message"]["content"]})()
+
+def start_fake(**kwargs):
+    server = make_fake_server(**kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+def test_retries_rate_limited_requests_against_fake_endpoint():
+    server, base_url = start_fake(rate_limit_every=2, retry_after=0.01)
+    client = LLMClient(FakeEndpointChat(base_url), max_retries=3)
+    try:
+        answers = [client.invoke(f"question {i}").content for i in range(4)]
+    finally:
+        server.shutdown()
+    assert answers == [f"echo: question {i}" for i in range(4)]
+    assert server.stats['rate_limited'] >= 1
+    assert client.stats()['retries'] == server.stats['rate_limited']
+
+def test_identical_inflight_prompts_share_one_request():
+    server, base_url = start_fake(latency=0.2)
+    client = LLMClient(FakeEndpointChat(base_url))
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(client.invoke("same").content)) for _ in range(5)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        server.shutdown()
+    assert results == ["echo: same"] * 5
+    assert server.stats['requests'] == 1
+    assert client.stats()['coalesced'] == 4
+
+def test_non_retryable_errors_propagate_immediately():
+    class Broken:
+        calls = 0
+
+        def invoke(self, prompt):
+            Broken.calls += 1
+            raise ValueError("bad request")
+
+    client = LLMClient(Broken(), max_retries=3)
+    with pytest.raises(ValueError):
+        client.invoke("x")
+    assert Broken.calls == 1
+    assert client.stats()['failures'] == 1
+
+def test_request_bucket_paces_callers():
+    class Echo:
+        def invoke(self, prompt):
+            return prompt
+
+    client = LLMClient(Echo())
+    client.request_bucket = TokenBucket(rate=10, capacity=1)
+    start = time.monotonic()
+    for i in range(4):
+        client.invoke(str(i))
+    assert time.monotonic() - start >= 0.25
+
+def test_set_limits_keeps_limits_that_are_not_given():
+    class Echo:
+        def invoke(self, prompt):
+            return prompt
+
+    client = LLMClient(Echo(), requests_per_minute=60, tokens_per_minute=1000)
+    token_bucket = client.token_bucket
+    client.set_limits(requests_per_minute=300)
+    assert client.token_bucket is token_bucket
+    assert client.request_bucket.rate == 5
+
+def test_response_cache_serves_deterministic_prompts_from_memory_and_disk(tmp_path):
+    server, base_url = start_fake()
+    path = str(tmp_path / "llm_cache.sqlite")
+    try:
+        first = LLMClient(FakeEndpointChat(base_url), cache=ResponseCache(path))
+        assert first.invoke("same").content == first.invoke("same").content == "echo: same"
+        # A fresh process only has the SQLite tier
+        second = LLMClient(FakeEndpointChat(base_url), cache=ResponseCache(path))
+        assert second.invoke("same").content == "echo: same"
+
+        sampled = FakeEndpointChat(base_url)
+        sampled.temperature = 0.7
+        third = LLMClient(sampled, cache=ResponseCache(path))
+        third.invoke("other")
+        third.invoke("other")
+        third.invoke("forced", force_cache=True)
+        third.invoke("forced", force_cache=True)
+    finally:
+        server.shutdown()
+    assert server.stats['requests'] == 4
+    assert first.stats()['cache']['memory_hits'] == 1
+    assert second.stats()['cache']['disk_hits'] == 1
+    assert third.stats()['cache']['hit_rate'] == 0.5
+
+def test_response_cache_disk_tier_is_capped_in_bytes(tmp_path):
+    cache = ResponseCache(str(tmp_path / "llm_cache.sqlite"), memory_entries=1, max_bytes=10000)
+    for i in range(5):
+        cache.put(f"k{i}", "x" * 3000)
+    cache.get("k2")  # refresh k2 so it outlives older entries
+    cache.put("k5", "y" * 3000)
+    rows = cache._conn.execute("SELECT key, size FROM llm_cache ORDER BY key").fetchall()
+    assert sum(size for _, size in rows) <= 10000
+    assert [key for key, _ in rows] == ["k2", "k4", "k5"]